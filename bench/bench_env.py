@@ -0,0 +1,201 @@
+"""
+Environment 吞吐量基准测试.
+
+对不同规模 N 的典型场景测量每秒步数、各阶段耗时和每步内存分配，
+结果以 JSON 输出，便于在版本之间比较.
+
+    python -m bench.bench_env --sizes 10,100,1000 --output bench.json
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from simu import Environment, Entity
+from simu import vec
+from simu.common import MoveEntity, MoveEntityArray
+from simu.kernel import GravityKernel
+from simu.profiler import StepProfiler
+
+
+class Body(Entity):
+    """ 二体运动中的物体（参见 test/test_2body.py）. """
+
+    def __init__(self, name=''):
+        super().__init__(name)
+        self.protect_props.append('pos')
+        self.pos = np.zeros(2)
+        self.vel = np.zeros(2)
+        self.m = 1.
+        self._f = np.zeros(2)
+
+    def step(self, time_info):
+        _, dt = time_info
+        self.vel += dt * self._f
+        self.pos += self.vel * dt
+        self._f = np.zeros(2)
+
+
+def gravity_rule(obj, other):
+    v = vec.unit(other.pos - obj.pos)
+    obj._f += 6.67e-11 * other.m / (vec.dist(obj.pos, other.pos) ** 2) * v
+
+
+def gravity_pair_rule(a, b, a_prev, b_prev):
+    d = b_prev.pos - a_prev.pos
+    f = 6.67e-11 * d / (vec.dist(a_prev.pos, b_prev.pos) ** 3)
+    if a is not None:
+        a._f += b_prev.m * f
+    if b is not None:
+        b._f -= a_prev.m * f
+
+
+def build_entity(n, rng):
+    env = Environment()
+    for _ in range(n):
+        env.add(Entity())
+    return env
+
+
+def build_move(n, rng):
+    env = Environment()
+    for _ in range(n):
+        env.add(MoveEntity(speed=1 + rng.random(), waypoints=rng.random((4, 2)) * 100))
+    return env
+
+
+def build_move_array(n, rng):
+    env = Environment()
+    group = env.add(MoveEntityArray())
+    for _ in range(n):
+        group.add(speed=1 + rng.random(), waypoints=rng.random((4, 2)) * 100)
+    return env
+
+
+def _bodies(n, rng, rule):
+    env = Environment()
+    for _ in range(n):
+        body = env.add(Body())
+        body.pos = rng.random(2) * 1e6
+        body.m = 1e20 * rng.random()
+        if rule is not None:
+            body.access_handlers.append(rule)
+    return env
+
+
+def build_body(n, rng):
+    return _bodies(n, rng, gravity_rule)
+
+
+def build_body_pair(n, rng):
+    env = _bodies(n, rng, None)
+    env.add_pair_handler(gravity_pair_rule)
+    return env
+
+
+def build_body_kernel(n, rng):
+    env = _bodies(n, rng, None)
+    env.access_kernels.append(GravityKernel())
+    return env
+
+
+SCENARIOS = {
+    'entity': build_entity,
+    'move': build_move,
+    'move_array': build_move_array,
+    'body': build_body,
+    'body_pair': build_body_pair,
+    'body_kernel': build_body_kernel,
+}
+
+
+def measure(build, n, steps, budget, seed=0) -> dict:
+    """ 测量单个场景.
+
+    :param steps: 最多测量的步数.
+    :param budget: 计时阶段的时间预算（秒），超出后提前结束（至少 1 步）.
+    :return: 每秒步数、每步各阶段耗时（秒）、每步内存分配峰值（字节）.
+    """
+    env = build(n, np.random.default_rng(seed))
+    env.reset(step=0.1, duration=1e9)
+    env.step()  # 预热.
+
+    count, t = 0, time.perf_counter()
+    while count < steps and (count == 0 or time.perf_counter() - t < budget):
+        env.step()
+        count += 1
+    elapsed = time.perf_counter() - t
+
+    env.profiler = StepProfiler()
+    for _ in range(count):
+        env.step()
+    phases = {key[1]: total / count for key, _, total in env.profiler.summary()
+              if key[0] == 'phase'}
+    env.profiler = None
+
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    env.step()
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+
+    return {
+        'steps': count,
+        'steps_per_sec': count / elapsed if elapsed > 0. else float('inf'),
+        'phases': phases,
+        'step_alloc_bytes': peak,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='10,100,1000,10000,100000',
+                        help='实体数量列表，逗号分隔.')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help='场景列表，逗号分隔. 可选: ' + ', '.join(SCENARIOS))
+    parser.add_argument('--steps', type=int, default=10, help='每个场景最多测量的步数.')
+    parser.add_argument('--budget', type=float, default=10.,
+                        help='每个场景的时间预算（秒）. 按 O(N^2) 估计单步耗时超出预算的'
+                             '更大规模将被跳过.')
+    parser.add_argument('--output', default=None, help='JSON 结果文件[可选].')
+    args = parser.parse_args(argv)
+
+    sizes = sorted(int(v) for v in args.sizes.split(',') if v)
+    results = []
+    for name in [v for v in args.scenarios.split(',') if v]:
+        build, prev = SCENARIOS[name], None
+        for n in sizes:
+            if prev is not None:
+                # 保守估计单步耗时（按 O(N^2) 增长）.
+                if (n / prev['n']) ** 2 / prev['steps_per_sec'] > args.budget:
+                    print('{:<12}{:>8}  skipped (over budget)'.format(name, n), flush=True)
+                    continue
+            ret = measure(build, n, args.steps, args.budget)
+            ret.update(scenario=name, n=n)
+            results.append(ret)
+            prev = ret
+            print('{:<12}{:>8}{:>14.1f} steps/s{:>14} B/step   {}'.format(
+                name, n, ret['steps_per_sec'], ret['step_alloc_bytes'],
+                ', '.join('%s=%.2es' % item for item in sorted(ret['phases'].items()))),
+                flush=True)
+
+    report = {
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == '__main__':
+    main()
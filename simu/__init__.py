@@ -2,4 +2,4 @@
 Time-Driven Simulatioin Framework
 """
 
-from .simu import Environment, Entity
+from .simu import Environment, BaseEntity, Entity, CompactEntity
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+from typing import Callable, Dict
+
+import numpy as np
+
+from .checkpoint import save_checkpoint, load_checkpoint
+
+
+class RunCache(object):
+    """ 运行缓存.
+
+    参数扫描时，很多参数只在某一时刻之后才影响仿真. 运行缓存在运行过程中
+    每隔 interval 步保存检查点，以场景和参数的指纹命名；之后的运行如果与
+    某个检查点之前的过程相同（指纹一致），则从最新的检查点继续运行.
+
+    检查点时刻 T 的指纹包括：场景名称、时钟的起始时刻和步长、检查点步数，
+    以及生效时刻早于 T 的参数. 参数的生效时刻由 run 的 effective 指定，
+    未指定的参数从起始时刻生效.
+
+    缓存目录的总大小超过 max_bytes 时，按最近使用时间（文件修改时间）淘汰.
+    检查点先写入临时文件再改名，并发运行或中断时不会留下不完整的检查点；
+    无法载入的检查点按未命中处理并删除.
+
+    注意：
+        检查点只包含实体状态（参见 checkpoint），环境步进事件（如 Recorder）
+        不会收到已缓存部分的步进；场景中的随机数状态需要通过实体的
+        get_state/set_state 保存. 场景代码改变时应修改场景名称.
+
+    Attributes:
+        path: 缓存目录.
+        max_bytes: 缓存目录的最大字节数.
+        interval: 保存检查点的间隔步数.
+        resumed_ticks: 最近一次运行恢复的检查点步数（未命中为 0）.
+    """
+
+    def __init__(self, path, max_bytes=1 << 30, interval=100):
+        self.path = path
+        self.max_bytes = int(max_bytes)
+        self.interval = max(int(interval), 1)
+        self.resumed_ticks = 0
+        os.makedirs(path, exist_ok=True)
+
+    def run(self, factory: Callable, params: Dict = None, effective: Dict = None,
+            scenario: str = None, **run_kwargs):
+        """ 运行场景，尽量从缓存的检查点继续.
+
+        :param factory: 场景构造函数，原型 factory(**params) -> Environment.
+        :param params: 场景参数.
+        :param effective: 参数的生效时刻[可选]，Dict[参数名, 时刻].
+            参数只影响该时刻及之后的步进.
+        :param scenario: 场景名称[可选]. 默认为构造函数的模块和名称.
+        :param run_kwargs: 传递给 Environment.reset 的参数（step, start, duration 等）.
+        :return: 运行结束后的环境.
+        """
+        params = params or {}
+        effective = effective or {}
+        if scenario is None:
+            scenario = '%s.%s' % (factory.__module__, factory.__qualname__)
+        env = factory(**params)
+        env.reset(**run_kwargs)
+        clock = env.clock
+        start, step = clock.time_info[0], clock.step_size
+
+        def fingerprint(ticks):
+            t = start + ticks * step - 1e-9 * step
+            items = {name: _canonical(value) for name, value in params.items()
+                     if effective.get(name, start) < t}
+            text = json.dumps([scenario, start, step, ticks, items], sort_keys=True)
+            return os.path.join(self.path, hashlib.sha1(text.encode()).hexdigest() + '.npz')
+
+        self.resumed_ticks = 0
+        ticks = clock.num_steps // self.interval * self.interval
+        while ticks > 0:
+            filename = fingerprint(ticks)
+            if os.path.exists(filename):
+                try:
+                    load_checkpoint(env, filename)
+                except (OSError, EOFError, KeyError, ValueError, zipfile.BadZipFile):
+                    _remove(filename)
+                    env = factory(**params)
+                    env.reset(**run_kwargs)
+                    clock = env.clock
+                    ticks -= self.interval
+                    continue
+                clock.set_values(**run_kwargs)
+                os.utime(filename)
+                self.resumed_ticks = ticks
+                break
+            ticks -= self.interval
+
+        while not env.is_over():
+            env.step()
+            if clock.ticks % self.interval == 0:
+                filename = fingerprint(clock.ticks)
+                if not os.path.exists(filename):
+                    self._save(env, filename)
+                    self.evict()
+        return env
+
+    def _save(self, env, filename):
+        """ 保存检查点：写入同一目录下的临时文件后改名. """
+        fd, temp = tempfile.mkstemp(suffix='.tmp', dir=self.path)
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                save_checkpoint(env, file)
+            os.replace(temp, filename)
+        except BaseException:
+            _remove(temp)
+            raise
+
+    def evict(self):
+        """ 按最近使用时间淘汰检查点，直至总大小不超过 max_bytes. """
+        files = []
+        for entry in os.scandir(self.path):
+            if entry.is_file() and entry.name.endswith('.npz'):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, filename in sorted(files):
+            if total <= self.max_bytes:
+                break
+            _remove(filename)
+            total -= size
+
+    def clear(self):
+        """ 清空缓存. """
+        for entry in os.scandir(self.path):
+            if entry.is_file() and entry.name.endswith('.npz'):
+                os.remove(entry.path)
+
+
+def _remove(filename):
+    """ 删除文件. 文件已被其他运行删除时忽略. """
+    try:
+        os.remove(filename)
+    except FileNotFoundError:
+        pass
+
+
+def _canonical(value):
+    """ 参数值的可序列化表示，用于计算指纹. """
+    if isinstance(value, np.ndarray):
+        return ['ndarray', value.dtype.str, value.shape, value.tolist()]
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return repr(value)
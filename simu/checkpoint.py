@@ -0,0 +1,153 @@
+import json
+from typing import Dict
+
+import numpy as np
+
+
+def save_checkpoint(env, path):
+    """ 保存运行中环境的检查点.
+
+    检查点包含环境状态（时钟和调度事件的条件状态，参见 Environment.get_state），
+    以及各实体的活动状态、保护属性（protect_props）和 get_state() 返回的附加状态
+    （实体定义了 get_state 时）.
+    不包含处理函数等场景结构，恢复时需要以相同的场景代码重建环境.
+
+    形状和类型相同的数组（或数值）按属性名称堆叠成连续数组，
+    以未压缩的 .npz 格式保存；其他类型的值以 JSON 保存，只支持 None、bool、int、
+    float、str、list、tuple、dict 及数值数组的组合. 载入检查点不会执行任意代码.
+
+    :param env: 仿真环境.
+    :param path: 文件路径（.npz）或二进制文件对象.
+    :raise TypeError: 状态中有不支持保存的值.
+    """
+    entities = env.entities
+    env_state = env.get_state()
+    clock = env_state['clock']
+    arrays = {
+        'clock': np.array([clock[key] for key in _CLOCK_KEYS], dtype=float),
+        'events': np.array(env_state['events'], dtype=bool),
+        'names': np.array([obj.name or '' for obj in entities], dtype=str),
+        'classes': np.array([type(obj).__qualname__ for obj in entities], dtype=str),
+        'active': np.array([obj.is_active() for obj in entities], dtype=bool),
+    }
+    buckets = {}  # Dict[Tuple[str, tuple, str], Tuple[List[int], List]]
+    objects = []  # List[Tuple[int, str, object]]
+    for i, obj in enumerate(entities):
+        for name, value in _entity_state(obj).items():
+            if isinstance(value, (np.ndarray, np.generic, bool, int, float)):
+                value = np.asarray(value)
+                if value.dtype != object:
+                    key = (name, value.shape, value.dtype.str)
+                    bucket = buckets.setdefault(key, ([], []))
+                    bucket[0].append(i)
+                    bucket[1].append(value)
+                    continue
+            objects.append([i, name, _encode(value)])
+    manifest = []
+    for k, ((name, _, _), (index, values)) in enumerate(buckets.items()):
+        arrays['s%d' % k] = np.stack(values)
+        arrays['s%d_index' % k] = np.array(index, dtype=np.int64)
+        manifest.append(name)
+    arrays['manifest'] = np.array(json.dumps(manifest))
+    arrays['objects'] = np.array(json.dumps(objects))
+    np.savez(path, **arrays)
+
+
+def load_checkpoint(env, path):
+    """ 从检查点恢复环境.
+
+    env 需以保存时相同的场景代码重建（实体的加入顺序、类型和名字一致）.
+    先重置环境，再恢复环境状态（调度事件从恢复的时刻起重新调度）和实体状态.
+    实体在 view_props 中声明的属性是所属群组数组的视图，原地拷贝以保留绑定
+    （非数组的值由所属群组自身的状态恢复）；其他属性以副本赋值.
+    恢复后以 step 继续运行（不要调用 reset 或 run，以免重置状态）.
+
+    :param env: 仿真环境.
+    :param path: 文件路径（.npz）或二进制文件对象.
+    :raise ValueError: 环境中的实体与检查点不一致.
+    """
+    with np.load(path, allow_pickle=False) as data:
+        entities = env.entities
+        names = data['names'].tolist()
+        classes = data['classes'].tolist()
+        if names != [obj.name or '' for obj in entities] or \
+                classes != [type(obj).__qualname__ for obj in entities]:
+            raise ValueError('Entities do not match the checkpoint.')
+        env.reset()
+        env.set_state({'clock': dict(zip(_CLOCK_KEYS, data['clock'].tolist())),
+                       'events': data['events'].tolist() if 'events' in data else None})
+
+        states = [{} for _ in entities]  # List[Dict[str, object]]
+        for k, name in enumerate(json.loads(data['manifest'].item())):
+            values = data['s%d' % k]
+            for i, value in zip(data['s%d_index' % k].tolist(), values):
+                states[i][name] = value
+        for i, name, value in json.loads(data['objects'].item()):
+            states[i][name] = _decode(value)
+        for obj, active, state in zip(entities, data['active'].tolist(), states):
+            if obj.is_active() != active:
+                obj.set_active(active)
+            _set_entity_state(obj, state)
+
+
+_CLOCK_KEYS = ('start', 'end', 'step', 'ticks', 'dt')
+
+
+def _encode(value):
+    """ 转换为可以 JSON 保存的值. 元组、字典和数组以带标记的对象表示. """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, np.generic) and not isinstance(value, np.object_):
+        return value.item()
+    if isinstance(value, np.ndarray) and value.dtype != object:
+        return {'ndarray': value.tolist(), 'dtype': value.dtype.str, 'shape': value.shape}
+    if isinstance(value, list):
+        return [_encode(v) for v in value]
+    if isinstance(value, tuple):
+        return {'tuple': [_encode(v) for v in value]}
+    if isinstance(value, dict):
+        return {'dict': [[_encode(k), _encode(v)] for k, v in value.items()]}
+    raise TypeError('Cannot save %s in a checkpoint.' % type(value).__name__)
+
+
+def _decode(value):
+    """ 由 JSON 保存的值恢复. 参见 _encode. """
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    if not isinstance(value, dict):
+        return value
+    if 'ndarray' in value:
+        return np.array(value['ndarray'], dtype=value['dtype']).reshape(value['shape'])
+    if 'tuple' in value:
+        return tuple(_decode(v) for v in value['tuple'])
+    return {_decode(k): _decode(v) for k, v in value['dict']}
+
+
+def _entity_state(obj) -> Dict:
+    """ 实体的检查点状态. """
+    state = {name: getattr(obj, name) for name in obj.protect_props if hasattr(obj, name)}
+    if hasattr(obj, 'get_state'):
+        state.update(obj.get_state())
+    return state
+
+
+def _set_entity_state(obj, state: Dict):
+    """ 恢复实体状态. """
+    extra = {}
+    props = set(obj.protect_props)
+    views = set(getattr(obj, 'view_props', ()))
+    for name, value in state.items():
+        if name not in props:
+            extra[name] = value
+            continue
+        current = getattr(obj, name, None)
+        if name in views:
+            if isinstance(current, np.ndarray):
+                current[...] = value
+        elif isinstance(value, np.ndarray):
+            setattr(obj, name, value.item() if value.shape == () and
+                    not isinstance(current, np.ndarray) else value.copy())
+        else:
+            setattr(obj, name, value)
+    if hasattr(obj, 'set_state'):
+        obj.set_state(extra)
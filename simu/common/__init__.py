@@ -1 +1 @@
-from .move import Track, MoveEntity
\ No newline at end of file
+from .move import Track, MoveEntity, MoveEntityArray, MoveEntityView
\ No newline at end of file
@@ -1,51 +1,141 @@
+from bisect import bisect_right
+
 import numpy as np
 
 from simu import Entity
 from simu import vec
 
 class Track(object):
-    """ 航线. """
+    """ 航线.
+
+    航线预先计算各航路点的累计航程，按已行进的航程以二分查找确定位置，
+    单次移动的耗时与航路点数量基本无关.
+    """
     def __init__(self, dim=2, **kwargs):
         self.dim = max(int(dim), 2)
         self.waypoints = []
+        self._lengths = None  # np.ndarray，各航路点的累计航程.
+        self._points = None  # np.ndarray，航路点数组 (W, dim).
+        self._bounds = []  # List[float]，各航路点的累计航程.
         self.set_values(**kwargs)
         self._index = 0
+        self._dist = 0.
+        self._position = None  # List[float]，上次移动后的位置.
 
     def set_values(self, **kwargs):
         if 'waypoints' in kwargs:
             self.waypoints.clear()
             for val in kwargs['waypoints']:
                 self.waypoints.append(vec.array(val))
+            self._lengths = None
+            self._position = None
 
     def reset(self):
         self._index = 0
+        self._dist = 0.
+        self._position = None
 
     def is_over(self):
         return (self._index + 1) >= len(self.waypoints)
 
     def move(self, pos, dist) -> np.ndarray:
-        curr = pos.copy()
-        while dist > 0:
-            # 获取当前目标点.
-            target = self._get_target()
-            if np.allclose(curr, target):
-                break
-            # 移动当前位置.
+        """ 沿航线前进指定距离.
+
+        pos 为航线上已行进航程处的位置时，按航程推进；
+        否则（如外部修改了位置）自 pos 向当前目标航路点直线前进，并据此更新航程.
+
+        :param pos: 当前位置.
+        :param dist: 前进距离.
+        :return: 新位置.
+        """
+        if self.waypoints:
+            expected = self._position
+            if expected is None:
+                expected = self.position_at_dist(self._dist).tolist()
+            if np.asarray(pos, dtype=float).tolist() != expected:
+                return self._move_from(pos, dist)
+        self.seek(self._dist + max(dist, 0.))
+        position = self.position_at_dist(self._dist)
+        self._position = position.tolist()
+        return position
+
+    def _move_from(self, pos, dist) -> np.ndarray:
+        """ 自航线外的位置 pos 向当前目标航路点直线前进. """
+        curr = np.array(pos, dtype=float)
+        waypoints, last = self.waypoints, len(self.waypoints) - 1
+        while dist > 0.:
+            target = waypoints[min(self._index + 1, last)]
             d = vec.dist(curr, target)
-            if dist <= d:
+            if dist < d:
                 curr += dist / d * (target - curr)
                 break
-            else:
-                curr = target
-                dist -= d
-                self._index += 1
+            curr[:] = target
+            dist -= d
+            if self._index >= last:
+                break
+            self._index += 1
+        # 以到目标航路点的剩余距离折算航程.
+        lengths = self.lengths
+        target_index = min(self._index + 1, last)
+        remain = vec.dist(curr, waypoints[target_index])
+        self._dist = min(max(float(lengths[target_index]) - remain,
+                             float(lengths[self._index])), self.length)
+        # 回到航线上后按航程推进.
+        on_track = np.allclose(curr, self.position_at_dist(self._dist))
+        self._position = curr.tolist() if on_track else None
         return curr
 
-    def _get_target(self) -> np.ndarray:
-        target_index = self._index + 1
-        if target_index >= len(self.waypoints):
-            return self.end
-        return self.waypoints[target_index]
+    def seek(self, dist: float):
+        """ 跳转至指定航程（限制在航线长度内）. """
+        self._dist = min(max(float(dist), 0.), self.length)
+        self._index = max(bisect_right(self._bounds, self._dist) - 1, 0)
+        self._position = None
+
+    def position_at_dist(self, dist) -> np.ndarray:
+        """ 航程 dist 处的位置.
+
+        :param dist: 航程，可以是数组.
+        :return: 位置，形状为 dist.shape + (dim,).
+        """
+        if not self.waypoints:
+            return np.zeros(np.shape(dist) + (self.dim,))
+        lengths, points = self.lengths, self._points
+        if len(points) == 1:
+            return np.broadcast_to(points[0], np.shape(dist) + points.shape[1:]).copy()
+        # 只在所在航段内插值.
+        if np.ndim(dist) == 0:
+            bounds, dist = self._bounds, float(dist)
+            index = min(max(bisect_right(bounds, dist) - 1, 0), len(bounds) - 2)
+            span = bounds[index + 1] - bounds[index]
+            ratio = min(max((dist - bounds[index]) / span, 0.), 1.) if span > 0. else 0.
+            start = points[index]
+            return start + (points[index + 1] - start) * ratio
+        dist = np.asarray(dist, dtype=float)
+        index = np.clip(np.searchsorted(lengths, dist, side='right') - 1, 0, len(points) - 2)
+        span = lengths[index + 1] - lengths[index]
+        ratio = np.clip((dist - lengths[index]) / np.where(span > 0., span, 1.), 0., 1.)
+        start = points[index]
+        return start + (points[index + 1] - start) * ratio[..., np.newaxis]
+
+    @property
+    def traveled(self) -> float:
+        """ 已行进的航程. """
+        return self._dist
+
+    @property
+    def length(self) -> float:
+        """ 航线总长度. """
+        lengths = self.lengths
+        return self._bounds[-1] if len(lengths) else 0.
+
+    @property
+    def lengths(self) -> np.ndarray:
+        """ 各航路点的累计航程. """
+        if self._lengths is None or len(self._lengths) != len(self.waypoints):
+            self._points = np.array(self.waypoints, dtype=float)
+            self._lengths = _cumulative_lengths(self._points)
+            self._bounds = self._lengths.tolist()
+        return self._lengths
 
     @property
     def start(self):
@@ -91,6 +181,16 @@ class MoveEntity(Entity):
         self.velocity = np.zeros_like(self.position)
         self.track.reset()
 
+    def get_state(self) -> dict:
+        """ 检查点附加状态（参见 checkpoint）. """
+        return {'speed': self.speed, 'traveled': self.track.traveled}
+
+    def set_state(self, state: dict):
+        if 'speed' in state:
+            self.speed = float(state['speed'])
+        if 'traveled' in state:
+            self.track.seek(float(state['traveled']))
+
     def move(self, time_info):
         prev_pos, dt = self.position, time_info[1]
         self.do_move(time_info)
@@ -99,3 +199,352 @@ class MoveEntity(Entity):
 
     def do_move(self, time_info):
         self.position = self.track.move(self.position, self.speed * time_info[1])
+
+    def position_at(self, t):
+        """ 以当前速度匀速运动时，自起点出发 t 时间后的位置.
+
+        :param t: 运动时间，可以是数组.
+        """
+        return self.track.position_at_dist(self.speed * np.asarray(t, dtype=float))
+
+    def seek(self, t: float):
+        """ 跳转至以当前速度匀速运动 t 时间后的状态，无需逐步推进. """
+        self.track.seek(self.speed * t)
+        self.position = self.track.position_at_dist(self.track.traveled)
+        self.velocity = np.zeros_like(self.position)
+        if not self.track.is_over():
+            i = self.track._index
+            delta = self.track.waypoints[i + 1] - self.track.waypoints[i]
+            self.velocity = self.speed * vec.unit(delta)
+
+
+class MoveEntityArray(Entity):
+    """ 运动物体群组.
+
+    以连续数组保存全部成员的位置 (N, dim)、速度 (N, dim)、速率 (N,)、
+    已行进航程 (N,) 和航线游标 (N,)，每次步进以向量化方式推进所有成员.
+
+    成员通过 add 创建，是独立的仿真实体：群组加入环境时成员随之加入，
+    可以通过 Environment.find 查找，并各自处理 step_events.
+    成员的 position/velocity 是群组数组中对应行的视图，修改时应原地赋值
+    （member.position[:] = ...）.
+
+    成员由群组统一管理（managed）：环境不逐个步进成员、不为成员生成镜像，
+    成员不单独执行互操作（只作为其他实体的互操作对象）.
+    群组每步将数组整体拷贝至镜像数组，成员镜像读取其中对应的行；
+    成员的步进事件在群组的步进事件之后、按群组的更新周期处理.
+    成员不活动时停止移动；成员移出环境时从群组中删除.
+
+    Attributes:
+        dim: 空间维度.
+        members: 成员列表.
+    """
+
+    def __init__(self, name='', dim=2):
+        super().__init__(name)
+        self.dim = max(int(dim), 2)
+        self.members = []  # List[MoveEntityView]
+        self._size = 0
+        self._positions = np.zeros((0, self.dim))
+        self._velocities = np.zeros((0, self.dim))
+        self._prev = np.zeros((0, self.dim))
+        self._speeds = np.zeros(0)
+        self._cursors = np.zeros(0, dtype=int)
+        self._traveled = np.zeros(0)
+        self._counts = np.zeros(0, dtype=int)
+        self._waypoints = np.zeros((0, 1, self.dim))
+        self._lengths = np.zeros((0, 1))
+        self._enabled = np.zeros(0, dtype=bool)  # 成员是否活动.
+        self._mirror_positions = np.zeros((0, self.dim))  # 步进前的位置（成员镜像）.
+        self._mirror_velocities = np.zeros((0, self.dim))
+        self.step_handlers.append(MoveEntityArray.move)
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def positions(self) -> np.ndarray:
+        """ 成员位置 (N, dim). """
+        return self._positions[:self._size]
+
+    @property
+    def velocities(self) -> np.ndarray:
+        """ 成员速度 (N, dim). """
+        return self._velocities[:self._size]
+
+    @property
+    def speeds(self) -> np.ndarray:
+        """ 成员速率 (N,). """
+        return self._speeds[:self._size]
+
+    @property
+    def cursors(self) -> np.ndarray:
+        """ 成员航线游标 (N,)，即当前所在航段的起点序号. """
+        return self._cursors[:self._size]
+
+    def add(self, name='', **kwargs) -> 'MoveEntityView':
+        """ 添加成员.
+
+        :param name: 成员名字.
+        :param kwargs: 成员参数，同 MoveEntity（speed, waypoints）.
+        :return: 新成员.
+        """
+        member = MoveEntityView(self, self._size, name)
+        self._reserve(self._size + 1)
+        self._size += 1
+        self.members.append(member)
+        self._enabled[member._index] = True
+        member._bind()
+        self._load(member._index, member._track)
+        member.set_values(**kwargs)
+        self._reset_member(member._index)
+        if self.env is not None:
+            self.env.add(member)
+        return member
+
+    def attach(self, env):
+        """ 绑定运行环境，成员随群组加入或退出环境. """
+        previous = self.env
+        super().attach(env)
+        if env is None and previous is not None:
+            for member in self.members:
+                previous.remove(member)
+        if env is not None:
+            for member in self.members:
+                env.add(member)
+
+    def remove(self, member: 'MoveEntityView'):
+        """ 删除成员. 最后一个成员移至其所在的行. """
+        index, last = member._index, self._size - 1
+        if not 0 <= index < self._size or self.members[index] is not member:
+            return
+        member.position, member.velocity = member.position.copy(), member.velocity.copy()
+        if index != last:
+            for array in (self._positions, self._velocities, self._prev, self._speeds,
+                          self._cursors, self._traveled, self._counts, self._waypoints,
+                          self._lengths, self._enabled):
+                array[index] = array[last]
+            moved = self.members[last]
+            moved._index = index
+            self.members[index] = moved
+            moved._bind()
+        self.members.pop()
+        self._size = last
+        member._index = -1
+        if member.env is not None and member.env is self.env:
+            member.env.remove(member)
+
+    def update_mirrors(self):
+        """ 将成员位置、速度整体拷贝至镜像数组. """
+        n = self._size
+        np.copyto(self._mirror_positions[:n], self._positions[:n])
+        np.copyto(self._mirror_velocities[:n], self._velocities[:n])
+
+    def on_step(self):
+        """ 处理群组和成员的步进事件. """
+        super().on_step()
+        for member in self.members:
+            if member.step_events and member.is_active():
+                member.on_step()
+
+    def reset(self):
+        n = self._size
+        self._positions[:n] = self._waypoints[:n, 0]
+        self._velocities[:n] = 0.
+        self._cursors[:n] = 0
+        self._traveled[:n] = 0.
+
+    def _reset_member(self, index: int):
+        self._positions[index] = self._waypoints[index, 0]
+        self._velocities[index] = 0.
+        self._cursors[index] = 0
+        self._traveled[index] = 0.
+
+    def get_state(self) -> dict:
+        """ 检查点附加状态（参见 checkpoint）. 成员的位置、速度由成员保存. """
+        n = self._size
+        return {'speeds': self._speeds[:n], 'cursors': self._cursors[:n],
+                'traveled': self._traveled[:n]}
+
+    def set_state(self, state: dict):
+        n = self._size
+        for name, array in (('speeds', self._speeds), ('cursors', self._cursors),
+                            ('traveled', self._traveled)):
+            if name in state:
+                array[:n] = state[name]
+
+    def move(self, time_info):
+        n, dt = self._size, time_info[1]
+        pos, vel, prev = self._positions[:n], self._velocities[:n], self._prev[:n]
+        np.copyto(prev, pos)
+        dist = self._speeds[:n] * dt
+        enabled = self._enabled[:n]
+        if not enabled.all():
+            dist[~enabled] = 0.
+        self._advance(dist)
+        if dt > 0.:
+            np.subtract(pos, prev, out=vel)
+            vel /= dt
+        else:
+            vel[:] = 0.
+
+    def _advance(self, dist: np.ndarray):
+        """ 所有成员沿各自航线移动指定距离（与 Track.move 一致）. """
+        n = self._size
+        rows = np.arange(n)
+        counts, cursors, lengths = self._counts[:n], self._cursors[:n], self._lengths[:n]
+        traveled = self._traveled[:n]
+        traveled += np.maximum(dist, 0.)
+        np.minimum(traveled, lengths[rows, counts - 1], out=traveled)
+        # 游标前移至航程所在航段（通常只需少数几次迭代）.
+        index = rows
+        while index.size:
+            nxt = cursors[index] + 1
+            index = index[nxt < counts[index]]
+            index = index[lengths[index, cursors[index] + 1] <= traveled[index]]
+            cursors[index] += 1
+        # 在航段内插值.
+        k = np.maximum(np.minimum(cursors, counts - 2), 0)
+        k1 = np.minimum(k + 1, counts - 1)
+        s0, s1 = lengths[rows, k], lengths[rows, k1]
+        span = s1 - s0
+        frac = np.divide(traveled - s0, span, out=np.zeros(n), where=span > 0.)
+        np.clip(frac, 0., 1., out=frac)
+        a, b = self._waypoints[rows, k], self._waypoints[rows, k1]
+        self._positions[:n] = a + frac[:, None] * (b - a)
+
+    def _load(self, index: int, track: Track):
+        """ 写入成员航线. """
+        points = track.waypoints if track.waypoints else [track.start]
+        self._reserve(self._size, len(points))
+        self._waypoints[index, :len(points)] = points
+        self._lengths[index, :len(points)] = _cumulative_lengths(points)
+        self._counts[index] = len(points)
+
+    def _reserve(self, size: int, num_waypoints=1):
+        """ 按需扩充数组容量，扩充后重新绑定成员视图. """
+        capacity, width = len(self._speeds), self._waypoints.shape[1]
+        if size > capacity:
+            capacity = max(size, 2 * capacity, 16)
+            self._positions = _resize(self._positions, capacity)
+            self._velocities = _resize(self._velocities, capacity)
+            self._prev = _resize(self._prev, capacity)
+            self._speeds = _resize(self._speeds, capacity)
+            self._cursors = _resize(self._cursors, capacity)
+            self._traveled = _resize(self._traveled, capacity)
+            self._counts = _resize(self._counts, capacity)
+            self._waypoints = _resize(self._waypoints, capacity)
+            self._lengths = _resize(self._lengths, capacity)
+            self._enabled = _resize(self._enabled, capacity)
+            self._mirror_positions = _resize(self._mirror_positions, capacity)
+            self._mirror_velocities = _resize(self._mirror_velocities, capacity)
+            for member in self.members:
+                member._bind()
+        if num_waypoints > width:
+            width = max(num_waypoints, 2 * width)
+            waypoints = np.zeros((capacity, width, self.dim))
+            waypoints[:, :self._waypoints.shape[1]] = self._waypoints
+            self._waypoints = waypoints
+            lengths = np.zeros((capacity, width))
+            lengths[:, :self._lengths.shape[1]] = self._lengths
+            self._lengths = lengths
+
+
+class MoveEntityView(Entity):
+    """ 运动物体群组的成员.
+
+    由 MoveEntityArray.add 创建，由群组统一步进（参见 MoveEntityArray）.
+
+    Attributes:
+        owner: 所属群组.
+        position: 当前位置（群组数组中对应行的视图）.
+        velocity: 瞬时速度（群组数组中对应行的视图）.
+        speed: 速度.
+        mirror: 镜像. 与成员共享属性，位置、速度读取群组镜像数组中对应的行.
+        view_props: 群组数组视图的属性名称，恢复状态时原地拷贝.
+    """
+
+    managed = True
+    view_props = ('position', 'velocity')
+
+    def __init__(self, owner: MoveEntityArray, index: int, name=''):
+        super().__init__(name)
+        self.protect_props.extend(['position', 'velocity'])
+        self.owner = owner
+        self._index = index
+        self._track = Track(dim=owner.dim)
+        self.position = None
+        self.velocity = None
+        self.mirror = object.__new__(_MoveEntityViewMirror)
+        self.mirror.__dict__ = self.__dict__
+
+    def set_values(self, **kwargs):
+        if 'speed' in kwargs:
+            self.speed = float(kwargs['speed'])
+        if 'waypoints' in kwargs:
+            self._track.set_values(waypoints=kwargs['waypoints'])
+            self.owner._load(self._index, self._track)
+
+    def reset(self):
+        """ 重置（由群组统一完成）. """
+        pass
+
+    def attach(self, env):
+        """ 绑定运行环境. 在群组仍处于环境中时移出环境，即从群组中删除. """
+        previous = self.env
+        super().attach(env)
+        if env is None and previous is not None and self.owner.env is previous:
+            self.owner.remove(self)
+
+    def set_active(self, active):
+        super().set_active(active)
+        if self._index >= 0:
+            self.owner._enabled[self._index] = bool(active)
+
+    @property
+    def speed(self) -> float:
+        return float(self.owner._speeds[self._index])
+
+    @speed.setter
+    def speed(self, value):
+        self.owner._speeds[self._index] = value
+
+    @property
+    def track(self) -> Track:
+        """ 航线（游标、航程与群组同步）. """
+        self._track._index = int(self.owner._cursors[self._index])
+        self._track._dist = float(self.owner._traveled[self._index])
+        return self._track
+
+    def _bind(self):
+        """ 绑定至群组数组中对应的行. """
+        self.position = self.owner._positions[self._index]
+        self.velocity = self.owner._velocities[self._index]
+
+
+class _MoveEntityViewMirror(MoveEntityView):
+    """ 成员镜像. 与成员共享属性字典，位置、速度为步进前的值（群组镜像数组中的行）. """
+
+    @property
+    def position(self) -> np.ndarray:
+        return self.owner._mirror_positions[self._index]
+
+    @property
+    def velocity(self) -> np.ndarray:
+        return self.owner._mirror_velocities[self._index]
+
+
+def _resize(a: np.ndarray, capacity: int) -> np.ndarray:
+    """ 扩充数组第一维至 capacity，保留原有内容. """
+    ret = np.zeros((capacity,) + a.shape[1:], dtype=a.dtype)
+    ret[:len(a)] = a
+    return ret
+
+
+def _cumulative_lengths(points) -> np.ndarray:
+    """ 各航路点的累计航程. """
+    if len(points) == 0:
+        return np.zeros(0)
+    points = np.asarray(points, dtype=float)
+    d = np.sqrt((np.diff(points, axis=0) ** 2).sum(axis=1))
+    return np.concatenate(([0.], np.cumsum(d)))
@@ -0,0 +1,63 @@
+import functools
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List
+
+import numpy as np
+
+
+class Ensemble(object):
+    """ 集合仿真（蒙特卡洛）.
+
+    对同一场景按多组参数重复运行，各次运行（副本）分配到进程池中并行执行.
+    副本只回传 summarize 的结果，不回传环境对象.
+
+    每个副本的随机种子由 seed 和副本序号确定，与进程数无关，结果可以复现.
+
+    Attributes:
+        factory: 场景构造函数，原型 factory(rng, **params) -> Environment.
+            rng 为副本专属的 numpy.random.Generator.
+        summarize: 结果提取函数，原型 summarize(env)，返回值需可序列化.
+        processes: 进程数. 默认使用全部 CPU；为 1 时在当前进程中顺序运行.
+        seed: 集合的根随机种子.
+        run_kwargs: 传递给 Environment.run 的参数.
+    """
+
+    def __init__(self, factory: Callable, summarize: Callable,
+                 processes=None, seed=0, **run_kwargs):
+        self.factory = factory
+        self.summarize = summarize
+        self.processes = processes
+        self.seed = seed
+        self.run_kwargs = run_kwargs
+
+    def run(self, param_sets: List[dict], reducer: Callable = None):
+        """ 运行全部副本.
+
+        :param param_sets: 各副本的场景参数.
+        :param reducer: 汇总函数[可选]，原型 reducer(summaries).
+        :return: 各副本结果列表（与 param_sets 顺序一致）；或汇总结果.
+        """
+        seeds = np.random.SeedSequence(self.seed).spawn(len(param_sets))
+        func = functools.partial(_run_replica, self.factory, self.summarize,
+                                 self.run_kwargs)
+        if self.processes == 1:
+            summaries = list(map(func, param_sets, seeds))
+        else:
+            workers = self.processes or os.cpu_count() or 1
+            chunk_size = max(1, len(param_sets) // (4 * workers))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                summaries = list(executor.map(func, param_sets, seeds,
+                                              chunksize=chunk_size))
+        return summaries if reducer is None else reducer(summaries)
+
+
+def _run_replica(factory, summarize, run_kwargs, params, seed_seq):
+    """ 运行单个副本. """
+    state = seed_seq.generate_state(2)
+    np.random.seed(int(state[0]))
+    random.seed(int(state[1]))
+    env = factory(np.random.default_rng(seed_seq), **params)
+    env.run(**run_kwargs)
+    return summarize(env)
@@ -0,0 +1,181 @@
+from typing import List
+
+import numpy as np
+
+
+class Integrator(object):
+    """ 积分器.
+
+    设置 env.integrator 后，具有位置、速度、加速度属性的实体由积分器推进状态：
+    互操作处理函数和互操作核将加速度累加至 acc_prop，积分器需要中间状态的
+    加速度时，通过 Environment.evaluate_access 以中间状态重新互操作.
+    积分完成后写回位置、速度，并将加速度清零，供下一步重新累加.
+
+    积分器在实体的 step 之前执行，实体的 step 不应再推进这些状态.
+
+    基类实现半隐式欧拉法（每步 1 次互操作）.
+
+    Attributes:
+        pos_prop: 位置属性名称.
+        vel_prop: 速度属性名称.
+        acc_prop: 加速度属性名称.
+    """
+
+    def __init__(self, pos_prop='pos', vel_prop='vel', acc_prop='acc'):
+        self.pos_prop = pos_prop
+        self.vel_prop = vel_prop
+        self.acc_prop = acc_prop
+
+    def select(self, obj) -> bool:
+        """ 判断实体是否由积分器推进. """
+        return hasattr(obj, self.pos_prop) and hasattr(obj, self.vel_prop) \
+            and hasattr(obj, self.acc_prop)
+
+    def integrate(self, env, entities: List, dt: float):
+        """ 推进实体状态.
+
+        :param env: 仿真环境.
+        :param entities: 需要推进的实体. 加速度已按当前状态累加.
+        :param dt: 步进时间.
+        """
+        if dt > 0. and entities:
+            x, v = self._gather(entities, self.pos_prop), self._gather(entities, self.vel_prop)
+            x, v = self.advance(env, entities, x, v, self._gather(entities, self.acc_prop), dt)
+            self._scatter(entities, self.pos_prop, x)
+            self._scatter(entities, self.vel_prop, v)
+        self._clear(entities)
+
+    def advance(self, env, entities: List, x: np.ndarray, v: np.ndarray, a: np.ndarray,
+                dt: float):
+        """ 积分一步.
+
+        :param x: 位置 (M, dim).
+        :param v: 速度 (M, dim).
+        :param a: 当前状态的加速度 (M, dim).
+        :return: (位置, 速度).
+        """
+        v = v + dt * a
+        return x + dt * v, v
+
+    def accel(self, env, entities: List, x: np.ndarray, v: np.ndarray) -> np.ndarray:
+        """ 计算实体处于状态 (x, v) 时的加速度. """
+        self._scatter(entities, self.pos_prop, x)
+        self._scatter(entities, self.vel_prop, v)
+        self._clear(entities)
+        env.evaluate_access(entities)
+        return self._gather(entities, self.acc_prop)
+
+    def _gather(self, entities: List, name: str) -> np.ndarray:
+        return np.array([getattr(obj, name) for obj in entities], dtype=float)
+
+    def _scatter(self, entities: List, name: str, values: np.ndarray):
+        for obj, value in zip(entities, values):
+            current = getattr(obj, name)
+            if isinstance(current, np.ndarray) and current.shape == value.shape:
+                current[...] = value
+            else:
+                setattr(obj, name, value.copy())
+
+    def _clear(self, entities: List):
+        name = self.acc_prop
+        for obj in entities:
+            acc = getattr(obj, name)
+            if isinstance(acc, np.ndarray):
+                acc[...] = 0.
+            else:
+                setattr(obj, name, 0.)
+
+
+SemiImplicitEuler = Integrator
+
+
+class Verlet(Integrator):
+    """ 速度 Verlet 积分器（二阶，辛积分，每步 2 次互操作）. """
+
+    def advance(self, env, entities, x, v, a, dt):
+        v = v + 0.5 * dt * a
+        x = x + dt * v
+        a = self.accel(env, entities, x, v)
+        return x, v + 0.5 * dt * a
+
+
+class RK4(Integrator):
+    """ 经典四阶龙格-库塔积分器（每步 4 次互操作）. """
+
+    def advance(self, env, entities, x, v, a, dt):
+        v2 = v + 0.5 * dt * a
+        a2 = self.accel(env, entities, x + 0.5 * dt * v, v2)
+        v3 = v + 0.5 * dt * a2
+        a3 = self.accel(env, entities, x + 0.5 * dt * v2, v3)
+        v4 = v + dt * a3
+        a4 = self.accel(env, entities, x + dt * v3, v4)
+        return x + dt / 6. * (v + 2. * v2 + 2. * v3 + v4), \
+            v + dt / 6. * (a + 2. * a2 + 2. * a3 + a4)
+
+
+class DormandPrince(Integrator):
+    """ Dormand-Prince 5(4) 自适应步长积分器.
+
+    在每个仿真步长内按误差估计自动划分子步，子步长在步与步之间延续.
+    子步长按步进时间 dt 分别保存，更新周期不同的实体组互不影响.
+    每个子步 6 次互操作（首尾共用）.
+
+    Attributes:
+        rtol: 相对误差限.
+        atol: 绝对误差限.
+        max_substeps: 每个仿真步长内的最大子步数.
+    """
+
+    _A = (
+        (),
+        (1 / 5,),
+        (3 / 40, 9 / 40),
+        (44 / 45, -56 / 15, 32 / 9),
+        (19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729),
+        (9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656),
+        (35 / 384, 0., 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84),
+    )
+    _E = (71 / 57600, 0., -71 / 16695, 71 / 1920, -17253 / 339200, 22 / 525, -1 / 40)
+
+    def __init__(self, pos_prop='pos', vel_prop='vel', acc_prop='acc',
+                 rtol=1e-6, atol=1e-9, max_substeps=10000):
+        super().__init__(pos_prop, vel_prop, acc_prop)
+        self.rtol = rtol
+        self.atol = atol
+        self.max_substeps = int(max_substeps)
+        self._h = {}  # Dict[float, float]，各步进时间的当前子步长.
+
+    def advance(self, env, entities, x, v, a, dt):
+        t, h = 0., self._h.get(dt, dt)
+        kx, kv = v, a  # 首级导数（FSAL）.
+        for _ in range(self.max_substeps):
+            if t >= dt * (1. - 1e-12):
+                break
+            step = min(h, dt - t)
+            ks = [(kx, kv)]
+            for row in self._A[1:]:
+                xs = x + step * sum(c * k[0] for c, k in zip(row, ks))
+                vs = v + step * sum(c * k[1] for c, k in zip(row, ks))
+                ks.append((vs, self.accel(env, entities, xs, vs)))
+            # 最后一级即五阶结果.
+            ex = step * sum(c * k[0] for c, k in zip(self._E, ks))
+            ev = step * sum(c * k[1] for c, k in zip(self._E, ks))
+            err = max(self._error(ex, x, xs), self._error(ev, v, vs))
+            factor = min(5., max(0.2, 0.9 * max(err, 1e-10) ** -0.2))
+            if err <= 1.:
+                t += step
+                x, v = xs, vs
+                kx, kv = ks[-1]
+                # 因步长末端截短的子步，不缩小后续步长.
+                h = max(h, step * factor) if step < h else step * factor
+            else:
+                h = step * factor
+        if t < dt * (1. - 1e-12):
+            raise RuntimeError('DormandPrince: too many substeps.')
+        self._h[dt] = h
+        return x, v
+
+    def _error(self, e: np.ndarray, y0: np.ndarray, y1: np.ndarray) -> float:
+        """ 归一化误差（均方根）. """
+        scale = self.atol + self.rtol * np.maximum(np.abs(y0), np.abs(y1))
+        return float(np.sqrt(np.mean((e / scale) ** 2))) if e.size else 0.
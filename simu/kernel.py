@@ -0,0 +1,99 @@
+from abc import ABCMeta, abstractmethod
+from typing import List
+
+import numpy as np
+
+
+class AccessKernel(object, metaclass=ABCMeta):
+    """ 批量互操作核.
+
+    与逐对调用的 access_handler 不同，互操作核一次性以数组形式接收
+    全部参与实体（步进前镜像）的状态，计算每个实体的累加量，
+    然后累加至实体的输出属性.
+
+    子类需要设置 in_props、out_prop，并实现 compute.
+
+    Attributes:
+        in_props: 输入属性名称列表. compute 按顺序接收这些属性堆叠成的数组.
+        out_prop: 输出属性名称. 计算结果累加至该属性.
+    """
+
+    in_props = ()  # Tuple[str]
+    out_prop = ''
+
+    def __call__(self, entities: List, mirrors: List, index: List[int] = None):
+        """ 执行互操作.
+
+        :param entities: 活动实体列表（写入对象）.
+        :param mirrors: 活动实体镜像列表（读取对象），与 entities 一一对应.
+        :param index: 接收计算结果的实体序号[可选]. 默认为全部实体.
+        """
+        selected = [i for i, mirror in enumerate(mirrors) if self.select(mirror)]
+        if not selected:
+            return
+        arrays = [np.array([getattr(mirrors[i], name) for i in selected], dtype=float)
+                  for name in self.in_props]
+        results = self.compute(*arrays)
+        targets = None if index is None or len(index) == len(entities) else set(index)
+        name = self.out_prop
+        for i, value in zip(selected, results):
+            if targets is not None and i not in targets:
+                continue
+            obj = entities[i]
+            acc = getattr(obj, name)
+            if isinstance(acc, np.ndarray):
+                acc += value
+            else:
+                setattr(obj, name, acc + value)
+
+    def select(self, obj) -> bool:
+        """ 判断实体是否参与计算. 默认要求实体具有全部输入、输出属性. """
+        return all(hasattr(obj, name) for name in self.in_props) \
+            and hasattr(obj, self.out_prop)
+
+    @abstractmethod
+    def compute(self, *arrays) -> np.ndarray:
+        """ 计算累加量.
+
+        :param arrays: 输入属性数组，第一维为参与实体.
+        :return: 每个参与实体的累加量，第一维为参与实体.
+        """
+
+
+class GravityKernel(AccessKernel):
+    """ 万有引力核.
+
+    计算每个实体受其他实体吸引产生的加速度 G * m_j * (p_j - p_i) / |p_j - p_i|^3.
+    按行分块计算，临时内存约为 block_size * N * dim.
+    """
+
+    def __init__(self, G=6.67e-11, pos_prop='pos', mass_prop='m', out_prop='_f',
+                 softening=0., block_size=256):
+        """ 初始化.
+
+        :param G: 引力常数.
+        :param pos_prop: 位置属性名称.
+        :param mass_prop: 质量属性名称.
+        :param out_prop: 加速度累加属性名称.
+        :param softening: 软化长度，避免近距离时加速度发散.
+        :param block_size: 分块行数.
+        """
+        self.G = G
+        self.in_props = (pos_prop, mass_prop)
+        self.out_prop = out_prop
+        self.softening = float(softening)
+        self.block_size = max(int(block_size), 1)
+
+    def compute(self, pos: np.ndarray, mass: np.ndarray) -> np.ndarray:
+        acc = np.zeros_like(pos)
+        eps2 = self.softening ** 2
+        for start in range(0, len(pos), self.block_size):
+            p = pos[start:start + self.block_size]
+            d = pos[None, :, :] - p[:, None, :]  # (b, N, dim)
+            r2 = (d * d).sum(axis=-1) + eps2
+            with np.errstate(divide='ignore'):
+                w = np.where(r2 > 0., r2 ** -1.5, 0.) * mass
+            rows = np.arange(len(p))
+            w[rows, start + rows] = 0.
+            acc[start:start + len(p)] = self.G * np.einsum('bn,bnd->bd', w, d)
+        return acc
@@ -0,0 +1,114 @@
+import threading
+import time
+from typing import List, Tuple
+
+from .simu import BaseEntity, CompactEntity, Entity, _handler_name
+
+
+class StepProfiler(object):
+    """ 步进性能统计.
+
+    设置 env.profiler = StepProfiler() 后，环境在步进时记录各阶段以及
+    各处理函数的耗时和调用次数. 未设置时（默认）不产生额外开销.
+
+    统计项的键为 (阶段, 实体类名, 处理函数名)：
+        ('phase', 阶段名, '') : 阶段总耗时.
+            阶段包括 snapshot, access, pair, kernel, integrate, step, on_step, step_events, clock.
+            clock 阶段包含实时仿真的等待时间.
+        ('access', 类名, 函数名) : 互操作处理函数.
+        ('pair', '', 函数名) : 成对互操作处理函数.
+        ('kernel', '', 名字) : 互操作核.
+        ('step', 类名, 函数名) : 步进处理函数.
+        ('on_step', 类名, 函数名) : 实体步进事件.
+        ('step_events', '', 函数名) : 环境步进事件.
+    重写了 access/step/on_step 的实体类，以重写的方法作为整体统计.
+
+    Attributes:
+        records: 统计结果，Dict[Tuple[str, str, str], [调用次数, 总耗时]].
+    """
+
+    def __init__(self):
+        self.records = {}
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """ 清空统计. """
+        self.records = {}
+
+    def add(self, key: Tuple[str, str, str], elapsed: float, count=1):
+        """ 累加一项统计. """
+        with self._lock:
+            record = self.records.get(key)
+            if record is None:
+                self.records[key] = [count, elapsed]
+            else:
+                record[0] += count
+                record[1] += elapsed
+
+    def call(self, key: Tuple[str, str, str], func, *args):
+        """ 调用 func 并统计耗时. """
+        t = time.perf_counter()
+        ret = func(*args)
+        self.add(key, time.perf_counter() - t)
+        return ret
+
+    def access(self, obj: Entity, others: List):
+        """ 执行实体互操作，按处理函数统计. """
+        cls = type(obj)
+        if _overridden(cls, 'access'):
+            return self.call(('access', cls.__name__, 'access'), obj.access, others)
+        for handler in _handlers(obj, 'access_handlers'):
+            t = time.perf_counter()
+            for other in others:
+                handler(obj, other)
+            self.add(('access', cls.__name__, _handler_name(handler)),
+                     time.perf_counter() - t, len(others))
+
+    def step(self, obj: Entity, time_info):
+        """ 执行实体步进，按处理函数统计. """
+        cls = type(obj)
+        if _overridden(cls, 'step'):
+            return self.call(('step', cls.__name__, 'step'), obj.step, time_info)
+        for handler in _handlers(obj, 'step_handlers'):
+            self.call(('step', cls.__name__, _handler_name(handler)), handler, obj, time_info)
+
+    def on_step(self, obj: Entity):
+        """ 执行实体步进事件，按处理函数统计. """
+        cls = type(obj)
+        if _overridden(cls, 'on_step'):
+            return self.call(('on_step', cls.__name__, 'on_step'), obj.on_step)
+        for evt in _handlers(obj, 'step_events'):
+            self.call(('on_step', cls.__name__, _handler_name(evt)), evt, obj)
+
+    def summary(self) -> List[Tuple[Tuple[str, str, str], int, float]]:
+        """ 统计结果列表 [(键, 调用次数, 总耗时)]，按总耗时降序排列. """
+        items = [(key, count, total) for key, (count, total) in self.records.items()]
+        return sorted(items, key=lambda item: item[2], reverse=True)
+
+    def report(self, top=None) -> str:
+        """ 生成统计报告.
+
+        :param top: 只列出耗时最多的若干项[可选].
+        """
+        items = self.summary()[:top]
+        lines = ['{:<12}{:<20}{:<28}{:>10}{:>12}{:>12}'.format(
+            'phase', 'class', 'handler', 'calls', 'total(s)', 'mean(us)')]
+        for (phase, owner, handler), count, total in items:
+            mean = total / count * 1e6 if count else 0.
+            lines.append('{:<12}{:<20}{:<28}{:>10}{:>12.4f}{:>12.2f}'.format(
+                phase, owner, handler, count, total, mean))
+        return '\n'.join(lines)
+
+
+def _overridden(cls, name: str) -> bool:
+    """ 实体类是否重写了 access、step 或 on_step（不计 BaseEntity 和 CompactEntity 的实现）. """
+    method = getattr(cls, name)
+    return method is not getattr(BaseEntity, name) and method is not getattr(CompactEntity, name)
+
+
+def _handlers(obj: Entity, name: str):
+    """ 实体的处理函数列表. 紧凑实体未复制列表时返回类的默认值（不为实例生成列表）. """
+    if isinstance(obj, CompactEntity):
+        handlers = getattr(obj, '_' + name)
+        return getattr(obj, 'default_' + name) if handlers is None else handlers
+    return getattr(obj, name)
@@ -0,0 +1,196 @@
+from typing import Callable, List, Set, Tuple
+
+import numpy as np
+
+
+class ProximityTrigger(object):
+    """ 接近触发器.
+
+    作为环境步进事件使用：env.step_events.append(trigger).
+    检测实体两两之间的距离穿越 radius 的时刻，触发进入、离开事件.
+
+    实体在一步内按匀速直线运动处理（与 MoveEntity 一致：
+    步进前位置 = position - velocity * dt），因此步长内快速掠过的实体
+    也能检测到，事件时刻为步长内插值得到的穿越时刻.
+
+    粗筛采用排序扫描（sweep-and-prune）：按步长内扫过的包围盒沿 x 轴排序，
+    以上一步的顺序为初始顺序（近似有序，排序接近线性），
+    只对包围盒相交的实体对求解穿越时刻. 上一步处于范围内的实体对总是参与精确检测，
+    实体瞬移离开时也能触发离开事件.
+
+    Attributes:
+        radius: 触发距离.
+        on_enter: 进入事件[可选]，原型 on_enter(a, b, t).
+        on_exit: 离开事件[可选]，原型 on_exit(a, b, t).
+        select: 实体筛选函数[可选]，原型 select(obj) -> bool.
+            默认检测具有位置属性的全部活动实体.
+        position_prop: 位置属性名称.
+        velocity_prop: 速度属性名称. 实体没有该属性时视为静止.
+
+    实体退出检测（移出环境、不再活动或不再被选中）时，其所在的处于范围内的实体对
+    以当前时刻触发离开事件.
+    """
+
+    def __init__(self, radius: float, on_enter: Callable = None, on_exit: Callable = None,
+                 select: Callable = None, position_prop='position', velocity_prop='velocity'):
+        self.radius = float(radius)
+        self.on_enter = on_enter
+        self.on_exit = on_exit
+        self.select = select
+        self.position_prop = position_prop
+        self.velocity_prop = velocity_prop
+        self._inside = set()  # Set[Tuple[int, int]]，处于范围内的实体对 (ID, ID).
+        self._members = {}  # Dict[int, Entity]，处于范围内的实体对中的实体.
+        self._ids = []  # List[int]，上一步的实体 ID.
+        self._ranks = np.zeros(0, dtype=np.int64)  # 上一步各实体在排序中的位置.
+
+    @property
+    def inside(self) -> Set[Tuple[int, int]]:
+        """ 处于范围内的实体对 (较小 ID, 较大 ID). """
+        return set(self._inside)
+
+    def reset(self):
+        """ 清空状态. """
+        self._inside, self._members = set(), {}
+        self._ids, self._ranks = [], np.zeros(0, dtype=np.int64)
+
+    def __call__(self, env):
+        t, dt = env.time_info
+        objs = [obj for obj in env.entities if obj.is_active()
+                and hasattr(obj, self.position_prop)
+                and (self.select is None or self.select(obj))]
+        departed = self._departed(objs)
+        if len(objs) < 2:
+            self._update_order(objs, np.zeros(len(objs)))
+            self._inside, self._members = set(), {}
+            self._exit(departed, t)
+            return
+        p1 = np.array([getattr(obj, self.position_prop) for obj in objs], dtype=float)
+        v = np.array([getattr(obj, self.velocity_prop) if hasattr(obj, self.velocity_prop)
+                      else np.zeros(p1.shape[1]) for obj in objs], dtype=float)
+        p0 = p1 - v * dt
+        half = 0.5 * self.radius
+        lo, hi = np.minimum(p0, p1) - half, np.maximum(p0, p1) + half
+
+        a, b = self._candidates(objs, lo, hi)
+        a, b = self._with_inside(objs, a, b)
+        events = self._narrow(objs, a, b, p0, p1, t - dt, dt)
+        events.sort(key=lambda item: item[0])
+        for time, enter, obj, other in events:
+            callback = self.on_enter if enter else self.on_exit
+            if callback is not None:
+                callback(obj, other, time)
+        self._exit(departed, t)
+
+    def _departed(self, objs: List) -> List:
+        """ 退出检测的实体所在的、处于范围内的实体对 [(a, b)]. """
+        if not self._inside:
+            return []
+        ids = {obj.id for obj in objs}
+        members = self._members
+        return [(members[a], members[b]) for a, b in sorted(self._inside)
+                if a not in ids or b not in ids]
+
+    def _exit(self, pairs: List, t: float):
+        """ 以时刻 t 触发离开事件. """
+        if self.on_exit is not None:
+            for obj, other in pairs:
+                self.on_exit(obj, other, t)
+
+    def _candidates(self, objs: List, lo: np.ndarray, hi: np.ndarray):
+        """ 粗筛：包围盒相交的实体对（序号数组）. """
+        order = self._update_order(objs, lo[:, 0])
+        n = len(order)
+        lo_x, hi_x = lo[order, 0], hi[order, 0]
+        ends = np.searchsorted(lo_x, hi_x, side='right')
+        counts = np.maximum(ends - np.arange(n) - 1, 0)
+        total = int(counts.sum())
+        first = np.repeat(np.arange(n), counts)
+        offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        a, b = order[first], order[first + 1 + offsets]
+        overlap = ((lo[a] <= hi[b]) & (lo[b] <= hi[a])).all(axis=1)
+        return a[overlap], b[overlap]
+
+    def _with_inside(self, objs: List, a: np.ndarray, b: np.ndarray):
+        """ 在候选实体对中加入上一步处于范围内的实体对.
+
+        瞬移、没有速度属性或不按步更新的实体，其包围盒不包含实际的运动轨迹，
+        离开范围的实体对可能不在候选中.
+        """
+        if not self._inside:
+            return a, b
+        index = {obj.id: k for k, obj in enumerate(objs)}
+        pairs = np.array([(index[i], index[j]) for i, j in self._inside
+                          if i in index and j in index], dtype=np.int64).reshape(-1, 2)
+        n = len(objs)
+        keys = np.minimum(a, b) * n + np.maximum(a, b)
+        extra = pairs[~np.isin(pairs.min(axis=1) * n + pairs.max(axis=1), keys)]
+        return np.concatenate([a, extra[:, 0]]), np.concatenate([b, extra[:, 1]])
+
+    def _update_order(self, objs: List, keys: np.ndarray) -> np.ndarray:
+        """ 按 keys 排序，以上一步的顺序为初始顺序.
+
+        :return: 排序后的实体序号.
+        """
+        ids = [obj.id for obj in objs]
+        n = len(ids)
+        if ids == self._ids:
+            ranks = self._ranks
+        else:
+            previous = {key: r for r, key in enumerate(self._ids)}
+            raw = np.array([previous.get(key, len(previous) + k) for k, key in enumerate(ids)],
+                           dtype=np.int64)
+            ranks = np.empty(n, dtype=np.int64)
+            ranks[np.argsort(raw, kind='stable')] = np.arange(n)
+        perm = np.empty(n, dtype=np.int64)
+        perm[ranks] = np.arange(n)
+        order = perm[np.argsort(keys[perm], kind='stable')]
+        self._ids = ids
+        self._ranks = np.empty(n, dtype=np.int64)
+        self._ranks[order] = np.arange(n)
+        return order
+
+    def _narrow(self, objs: List, a: np.ndarray, b: np.ndarray, p0: np.ndarray,
+                p1: np.ndarray, t0: float, dt: float) -> List:
+        """ 精确检测：求解步长内距离等于 radius 的时刻.
+
+        :return: 事件列表 [(时刻, 是否进入, a, b)].
+        """
+        r2 = self.radius * self.radius
+        d0, d1 = p0[b] - p0[a], p1[b] - p1[a]
+        delta = d1 - d0
+        qa = (delta * delta).sum(axis=1)
+        qb = 2. * (d0 * delta).sum(axis=1)
+        qc = (d0 * d0).sum(axis=1) - r2
+        now_inside = (d1 * d1).sum(axis=1) <= r2
+        disc = qb * qb - 4. * qa * qc
+        root = np.sqrt(np.maximum(disc, 0.))
+        moving = qa > 0.
+        denom = np.where(moving, 2. * qa, 1.)
+        s_enter = np.where(moving, (-qb - root) / denom, 0.)
+        s_exit = np.where(moving, (-qb + root) / denom, 1.)
+        # 步长内掠过：首尾均在范围外，但中途进入.
+        passing = ~now_inside & moving & (disc > 0.) & (qc > 0.) \
+            & (s_enter >= 0.) & (s_enter <= 1.)
+        s_enter, s_exit = np.clip(s_enter, 0., 1.), np.clip(s_exit, 0., 1.)
+
+        events, inside, members = [], set(), {}
+        previous = self._inside
+        for k, (i, j) in enumerate(zip(a.tolist(), b.tolist())):
+            obj, other = objs[i], objs[j]
+            if obj.id > other.id:
+                obj, other = other, obj
+            key = (obj.id, other.id)
+            was_inside = key in previous
+            if now_inside[k]:
+                inside.add(key)
+                members[obj.id], members[other.id] = obj, other
+                if not was_inside:
+                    events.append((t0 + s_enter[k] * dt, True, obj, other))
+            elif was_inside:
+                events.append((t0 + s_exit[k] * dt, False, obj, other))
+            elif passing[k]:
+                events.append((t0 + s_enter[k] * dt, True, obj, other))
+                events.append((t0 + s_exit[k] * dt, False, obj, other))
+        self._inside, self._members = inside, members
+        return events
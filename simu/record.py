@@ -0,0 +1,177 @@
+import json
+import os
+from typing import Callable, Dict, List
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+
+class Recorder(object):
+    """ 轨迹记录器.
+
+    作为环境步进事件使用：env.step_events.append(recorder).
+    每步将选定实体的属性写入预分配的列数组，列数组的长度按时钟步数确定.
+
+    指定 path 时，数据先写入固定大小的块缓存，写满后转存至目录中的
+    内存映射 .npy 文件，内存占用与运行时长无关. 目录内容:
+        meta.json : 属性名称、实体 ID、名字和已记录步数.
+        time.npy : 时刻 (步数,).
+        <prop>.npy : 属性值 (步数, 实体数, ...).
+
+    记录的实体在第一次记录时确定. 环境重置后（时刻回退）重新开始记录.
+
+    Attributes:
+        props: 记录的属性名称列表.
+        select: 实体筛选函数[可选]，原型 select(obj) -> bool.
+            默认记录具有全部属性的实体.
+        path: 输出目录[可选].
+        chunk_size: 块缓存的步数.
+    """
+
+    def __init__(self, props=('position',), select: Callable = None, path=None,
+                 chunk_size=1024):
+        self.props = list(props)
+        self.select = select
+        self.path = path
+        self.chunk_size = max(int(chunk_size), 1)
+        self._entities = None  # List[Entity]
+        self._shapes = {}  # Dict[str, Tuple[tuple, np.dtype]]，每步数据的形状和类型.
+        self._columns = {}  # Dict[str, np.ndarray]，列数组（内存或内存映射）.
+        self._buffers = {}  # Dict[str, np.ndarray]，块缓存（仅输出至目录时）.
+        self._count = 0  # 列数组中的步数.
+        self._buffered = 0  # 块缓存中的步数.
+        self._last_time = None
+
+    def __call__(self, env):
+        t = env.time_info[0]
+        if self._entities is None or (self._last_time is not None and t <= self._last_time):
+            self.flush()
+            self._open(env)
+        if self.path is None:
+            self._grow_columns(self._count + 1)
+            rows, k = self._columns, self._count
+            self._count += 1
+        else:
+            rows, k = self._buffers, self._buffered
+            self._buffered += 1
+        rows['time'][k] = t
+        for prop in self.props:
+            values = rows[prop][k]
+            for j, obj in enumerate(self._entities):
+                values[j] = getattr(obj, prop)
+        self._last_time = t
+        if self._buffered == self.chunk_size:
+            self.flush()
+
+    @property
+    def entities(self) -> List:
+        """ 记录的实体列表. """
+        return list(self._entities or [])
+
+    @property
+    def records(self) -> Dict[str, np.ndarray]:
+        """ 已记录的数据. 包含 'time' 和各属性. """
+        self.flush()
+        return {name: column[:self._count] for name, column in self._columns.items()}
+
+    def flush(self):
+        """ 将块缓存写入输出文件. """
+        n = self._buffered
+        if self.path is None or self._entities is None or not n:
+            return
+        self._grow_files(self._count + n)
+        for name, buffer in self._buffers.items():
+            column = self._columns[name]
+            column[self._count:self._count + n] = buffer[:n]
+            column.flush()
+        self._count += n
+        self._buffered = 0
+        self._write_meta()
+
+    def close(self):
+        """ 结束记录，写入剩余数据. """
+        self.flush()
+        self._entities = None
+        self._columns, self._buffers = {}, {}
+
+    def _open(self, env):
+        """ 确定记录的实体，分配列数组. """
+        select = self.select or (lambda obj: all(hasattr(obj, p) for p in self.props))
+        self._entities = [obj for obj in env.entities if select(obj)]
+        self._count, self._buffered, self._last_time = 0, 0, None
+        n = len(self._entities)
+        self._shapes = {'time': ((), np.dtype(float))}
+        for prop in self.props:
+            value = np.asarray(getattr(self._entities[0], prop)) if n else np.zeros(0)
+            self._shapes[prop] = ((n,) + value.shape, value.dtype)
+        self._columns = {}
+        capacity = env.clock.num_steps + 1
+        if self.path is None:
+            self._grow_columns(capacity)
+        else:
+            os.makedirs(self.path, exist_ok=True)
+            self._grow_files(capacity)
+            self._buffers = {name: np.zeros((self.chunk_size,) + shape, dtype=dtype)
+                             for name, (shape, dtype) in self._shapes.items()}
+            self._write_meta()
+
+    def _capacity(self) -> int:
+        return len(self._columns['time']) if self._columns else 0
+
+    def _grow_columns(self, size: int):
+        """ 扩充内存中的列数组（按倍数扩充，保留已有数据）. """
+        capacity = self._capacity()
+        if size <= capacity:
+            return
+        capacity = max(size, 2 * capacity)
+        for name, (shape, dtype) in self._shapes.items():
+            column = np.zeros((capacity,) + shape, dtype=dtype)
+            if name in self._columns:
+                column[:self._count] = self._columns[name][:self._count]
+            self._columns[name] = column
+
+    def _grow_files(self, size: int):
+        """ 扩充输出文件（按倍数扩充，保留已有数据）. """
+        capacity = self._capacity()
+        if size <= capacity:
+            return
+        capacity = max(size, 2 * capacity)
+        for name, (shape, dtype) in self._shapes.items():
+            filename = os.path.join(self.path, name + '.npy')
+            old = self._columns.pop(name, None)
+            if old is not None:
+                os.replace(filename, filename + '.old')
+            column = open_memmap(filename, mode='w+', dtype=dtype,
+                                 shape=(capacity,) + shape)
+            if old is not None:
+                column[:self._count] = old[:self._count]
+                del old
+                os.remove(filename + '.old')
+            self._columns[name] = column
+
+    def _write_meta(self):
+        meta = {
+            'props': self.props,
+            'ids': [obj.id for obj in self._entities],
+            'names': [obj.name for obj in self._entities],
+            'count': self._count,
+        }
+        with open(os.path.join(self.path, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+
+
+def load_records(path, mmap_mode='r') -> Dict:
+    """ 读取 Recorder 输出目录.
+
+    :param path: 输出目录.
+    :param mmap_mode: 数组的内存映射方式，参见 numpy.load.
+    :return: 字典，包含 'time'、各属性数组（已截取至记录步数），以及 'ids'、'names'.
+    """
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+    count = meta['count']
+    records = {'ids': meta['ids'], 'names': meta['names']}
+    for name in ['time'] + meta['props']:
+        records[name] = np.load(os.path.join(path, name + '.npy'),
+                                mmap_mode=mmap_mode)[:count]
+    return records
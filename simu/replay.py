@@ -0,0 +1,148 @@
+import os
+from typing import Dict
+
+import numpy as np
+
+from .record import load_records
+from .simu import Entity
+
+
+class Replayer(Entity):
+    """ 轨迹回放器.
+
+    将 Recorder 记录的轨迹回放至环境中：每个记录的实体对应一个回放实体
+    （ReplayEntity），其属性取自回放时刻对应的记录帧，而不是由处理函数计算.
+    回放实体是普通的仿真实体，可以与实时计算的实体混合运行，
+    例如以固定的记录数据检验新的传感器或互操作逻辑.
+
+    回放器加入环境时回放实体随之加入. 每步回放时刻前进 speed * dt，
+    按时刻二分查找记录帧，整帧拷贝（记录为内存映射文件时直接读取映射）.
+
+    Attributes:
+        records: 记录数据，参见 record.load_records.
+        props: 回放的属性名称列表.
+        speed: 回放速度（回放时间与仿真时间的比例）.
+        interpolate: 是否在相邻记录帧之间线性插值. 默认取不晚于回放时刻的最近一帧.
+        members: 回放实体列表.
+    """
+
+    def __init__(self, records, name='', speed=1., interpolate=False):
+        """ 初始化.
+
+        :param records: 记录数据（Recorder.records 或 load_records 的结果），或记录目录.
+        """
+        super().__init__(name)
+        if isinstance(records, (str, os.PathLike)):
+            records = load_records(records)
+        self.records = records  # Dict[str, np.ndarray]
+        self.props = [key for key in records if key not in ('time', 'ids', 'names')]
+        self.speed = float(speed)
+        self.interpolate = interpolate
+        self._times = np.asarray(records['time'], dtype=float)
+        if not len(self._times):
+            raise ValueError('No records to replay.')
+        self._frame = {prop: np.array(records[prop][0]) for prop in self.props}
+        self._index = 0
+        self._time = float(self._times[0])
+        count = len(records['ids']) if 'ids' in records else \
+            (len(self._frame[self.props[0]]) if self.props else 0)
+        names = records.get('names') or [''] * count
+        self.members = [ReplayEntity(self, j, names[j]) for j in range(count)]
+        self.step_handlers.append(Replayer.replay)
+
+    @property
+    def time(self) -> float:
+        """ 回放时刻. """
+        return self._time
+
+    @property
+    def frame_index(self) -> int:
+        """ 当前记录帧的序号. """
+        return self._index
+
+    @property
+    def frame(self) -> Dict[str, np.ndarray]:
+        """ 当前帧的属性值，第一维为回放实体. """
+        return self._frame
+
+    def attach(self, env):
+        """ 绑定运行环境，回放实体随回放器加入或退出环境. """
+        if env is None and self.env is not None:
+            for member in self.members:
+                self.env.remove(member)
+        super().attach(env)
+        if env is not None:
+            for member in self.members:
+                env.add(member)
+
+    def reset(self):
+        self.seek(self._times[0])
+
+    def is_over(self) -> bool:
+        """ 是否已回放至最后一帧. """
+        return self._time >= self._times[-1]
+
+    def get_state(self) -> dict:
+        """ 检查点附加状态（参见 checkpoint）. """
+        return {'replay_time': self._time, 'speed': self.speed}
+
+    def set_state(self, state: dict):
+        if 'speed' in state:
+            self.speed = float(state['speed'])
+        if 'replay_time' in state:
+            self.seek(float(state['replay_time']))
+
+    def seek(self, t: float):
+        """ 跳转至回放时刻 t. """
+        self._time = float(t)
+        self._load()
+
+    def replay(self, time_info):
+        """ 步进：回放时刻前进，载入对应的记录帧. """
+        self._time += self.speed * time_info[1]
+        self._load()
+
+    def _load(self):
+        """ 载入回放时刻对应的记录帧. """
+        times, t = self._times, self._time
+        k = int(np.searchsorted(times, t, side='right')) - 1
+        k = min(max(k, 0), len(times) - 1)
+        self._index = k
+        w = 0.
+        if self.interpolate and k + 1 < len(times) and t > times[k]:
+            w = (t - times[k]) / (times[k + 1] - times[k])
+        for prop, frame in self._frame.items():
+            column = self.records[prop]
+            if w > 0. and np.issubdtype(frame.dtype, np.floating):
+                a = column[k]
+                np.add(a, w * (column[k + 1] - a), out=frame)
+            else:
+                np.copyto(frame, column[k])
+
+
+class ReplayEntity(Entity):
+    """ 回放实体.
+
+    由 Replayer 创建，其回放属性读取回放器当前帧中对应的行
+    （数组属性为视图，不应原地修改）. 回放属性为保护属性，
+    互操作时其他实体读取步进前的值.
+
+    Attributes:
+        owner: 所属回放器.
+        view_props: 读取回放帧的属性名称，由回放器恢复，恢复状态时不重新赋值.
+    """
+
+    def __init__(self, owner: Replayer, index: int, name=''):
+        super().__init__(name)
+        self.owner = owner
+        self._index = index
+        self.protect_props.extend(owner.props)
+        self.view_props = tuple(owner.props)
+
+    def __getattr__(self, name):
+        # 只在常规属性查找失败时调用.
+        owner = self.__dict__.get('owner')
+        if owner is None or name not in owner._frame:
+            raise AttributeError(name)
+        return owner._frame[name][self._index]
+
@@ -1,39 +1,63 @@
+from concurrent.futures import ThreadPoolExecutor
+from bisect import bisect_left
+from itertools import chain, combinations, count, islice, product
 from typing import List, Tuple
+import asyncio
+import functools
+import heapq
+import inspect
 import time
 import copy
 
+import numpy as np
 
-class Entity(object):
-    """ 仿真实体.
+from .spatial import NeighborIndex, UniformGrid
+
+
+class BaseEntity(object):
+    """ 仿真实体基类.
+
+    定义实体的接口和公共实现，不限定属性的存储方式. 一般使用其子类
+    Entity（通用实体）或 CompactEntity（紧凑实体）.
 
     Attributes:
         id: ID.
         name: 名字[可选].
         env: 实体所绑定的环境.
-        step_handlers: 步进处理函数列表.
-            步进处理函数原型 step_handler(obj, time_info)
-        access_handlers: 互操作处理函数列表.
-            互操作处理函数原型 access_handler(obj, other)
-        protect_props: 需要保护的属性名称列表.
+        group: 互操作分组[可选]. 参见 Environment.set_interaction.
+        interaction_radius: 互操作半径[可选].
+            设置后，互操作时只接收该半径范围内的其他实体.
+        position_prop: 位置属性名称，用于按互操作半径筛选实体.
+        update_period: 更新周期，仿真步长的整数倍.
+            实体只在时钟步数为其整数倍时执行互操作、步进和步进事件，
+            步进时间为 update_period 个仿真步长. 实时仿真丢弃步数时，
+            在越过整数倍后的第一步更新，步进时间为距上次更新的实际时间.
+        managed: 是否由所属实体统一管理（如 MoveEntityArray 的成员）.
+            环境不单独执行其互操作、步进和步进事件（由所属实体执行），
+            只作为其他实体的互操作对象，镜像由实体的 mirror 属性提供
+            （所属实体在 update_mirrors 中更新）.
     """
 
+    __slots__ = ()
+
     _GlobalId: int = 0  # 全局 ID 计数器.
+    interaction_radius: float = None
+    position_prop: str = 'position'
+    update_period: int = 1
+    managed: bool = False
 
     @classmethod
     def _gen_entity_id(cls) -> int:
         """ 生成实体 ID. """
-        Entity._GlobalId += 1
-        return Entity._GlobalId
+        BaseEntity._GlobalId += 1
+        return BaseEntity._GlobalId
 
     def __init__(self, name=''):
         self.env = None  # Environment
-        self._id = Entity._gen_entity_id()
+        self._id = BaseEntity._gen_entity_id()
         self._active = True  # bool
-        self.protect_props = []  # List[str]
-        self.name = name  # str
-        self.step_handlers = []  # List
-        self.step_events = []  # List
-        self.access_handlers = []  # List
+        self._name = name  # str
+        self._group = None  # str
 
     def __deepcopy__(self, memodict={}):
         """ 对象深拷贝.
@@ -53,6 +77,28 @@ class Entity(object):
         """ 实体 ID. """
         return self._id
 
+    @property
+    def name(self) -> str:
+        """ 名字. """
+        return self._name
+
+    @name.setter
+    def name(self, value: str):
+        if self.env is not None:
+            self.env._rename(self, value)
+        self._name = value
+
+    @property
+    def group(self) -> str:
+        """ 互操作分组. """
+        return self._group
+
+    @group.setter
+    def group(self, value: str):
+        self._group = value
+        if self.env is not None:
+            self.env._regroup(self)
+
     def attach(self, env):
         """ 绑定运行环境. """
         self.env = env
@@ -72,37 +118,211 @@ class Entity(object):
             evt(self)
 
     def access(self, others: List):
-        """ 与其他实体交互. """
+        """ 与其他实体交互.
+
+        :param others: 其他实体（镜像）序列，支持迭代、len 和下标访问.
+        """
+        if not self.access_handlers:
+            return
         for other in others:
             for handler in self.access_handlers:
                 handler(self, other)
 
+    def update_mirrors(self):
+        """ 更新所管理成员的镜像（参见 managed）. 环境在生成镜像前调用重写了该方法的实体. """
+        pass
+
     def is_active(self) -> bool:
-        """ 是否处于活动状态（是否参与仿真）"""
+        """ 是否处于活动状态（是否参与仿真）
+
+        一般通过 set_active 控制. 子类重写 is_active 时，环境每步检查其返回值.
+        """
         return self._active
 
     def set_active(self, active):
         """ 设置活动状态（可以控制实体退出仿真）"""
         self._active = active
+        if self.env is not None:
+            self.env._set_active(self, active)
+
+
+class Entity(BaseEntity):
+    """ 仿真实体.
+
+    Attributes:
+        id: ID.
+        name: 名字[可选].
+        env: 实体所绑定的环境.
+        step_handlers: 步进处理函数列表.
+            步进处理函数原型 step_handler(obj, time_info)
+        access_handlers: 互操作处理函数列表.
+            互操作处理函数原型 access_handler(obj, other)
+        protect_props: 需要保护的属性名称列表.
+        group: 互操作分组[可选]. 参见 Environment.set_interaction.
+        interaction_radius: 互操作半径[可选].
+            设置后，互操作时只接收该半径范围内的其他实体.
+        position_prop: 位置属性名称，用于按互操作半径筛选实体.
+        update_period: 更新周期，仿真步长的整数倍.
+            实体只在时钟步数为其整数倍时执行互操作、步进和步进事件，
+            步进时间为 update_period 个仿真步长. 实时仿真丢弃步数时，
+            在越过整数倍后的第一步更新，步进时间为距上次更新的实际时间.
+    """
+
+    def __init__(self, name=''):
+        super().__init__(name)
+        self.protect_props = []  # List[str]
+        self.step_handlers = []  # List
+        self.step_events = []  # List
+        self.access_handlers = []  # List
+
+
+class CompactEntity(BaseEntity):
+    """ 紧凑仿真实体.
+
+    用于数量巨大的轻量实体（诱饵、碎片等）. 与 Entity 的区别：
+    1.采用 __slots__，没有实例字典. 子类需要以 __slots__ 声明自己的属性.
+    2.处理函数列表默认共享类属性中的元组（default_step_handlers 等），
+      第一次通过 step_handlers 等属性访问时才为实例复制成列表.
+    3.protect_props 为类属性（元组），同类实例共享.
+    4.没有保护属性的紧凑实体不生成镜像，其他实体互操作时直接读取实体本身
+      （步进前的状态由互操作在步进之前执行保证）.
+
+    每个实例约占 136 字节，Entity 约 420 字节（含 ID，不含自定义属性；
+    64 位 CPython 3.11，以 tracemalloc 统计 10 万个实例）.
+    """
+
+    __slots__ = ('env', '_id', '_active', '_name', '_group',
+                 '_step_handlers', '_step_events', '_access_handlers')
+
+    protect_props = ()  # Tuple[str]
+    default_step_handlers = ()  # Tuple
+    default_step_events = ()  # Tuple
+    default_access_handlers = ()  # Tuple
+
+    def __init__(self, name=''):
+        super().__init__(name)
+        self._step_handlers = None  # List，首次访问时由默认值复制.
+        self._step_events = None  # List
+        self._access_handlers = None  # List
+
+    @property
+    def step_handlers(self) -> List:
+        """ 步进处理函数列表. """
+        if self._step_handlers is None:
+            self._step_handlers = list(self.default_step_handlers)
+        return self._step_handlers
+
+    @step_handlers.setter
+    def step_handlers(self, value):
+        self._step_handlers = list(value)
+
+    @property
+    def step_events(self) -> List:
+        """ 步进事件列表. """
+        if self._step_events is None:
+            self._step_events = list(self.default_step_events)
+        return self._step_events
+
+    @step_events.setter
+    def step_events(self, value):
+        self._step_events = list(value)
+
+    @property
+    def access_handlers(self) -> List:
+        """ 互操作处理函数列表. """
+        if self._access_handlers is None:
+            self._access_handlers = list(self.default_access_handlers)
+        return self._access_handlers
+
+    @access_handlers.setter
+    def access_handlers(self, value):
+        self._access_handlers = list(value)
+
+    def step(self, time_info):
+        """ 步进. """
+        handlers = self._step_handlers
+        for handler in self.default_step_handlers if handlers is None else handlers:
+            handler(self, time_info)
+
+    def on_step(self):
+        """ 处理步进消息. """
+        events = self._step_events
+        for evt in self.default_step_events if events is None else events:
+            evt(self)
+
+    def access(self, others: List):
+        """ 与其他实体交互. """
+        handlers = self._access_handlers
+        if handlers is None:
+            handlers = self.default_access_handlers
+        if not handlers:
+            return
+        for other in others:
+            for handler in handlers:
+                handler(self, other)
 
 
 class Environment(object):
     """ 仿真环境.
 
     1.实体管理功能.
-        add, remove, find
+        add, remove, find, find_all
     2.仿真管理功能. 
         reset, run, step
 
     Attributes:
         step_evnets: 步进处理函数列表.
             步进处理函数原型 step_event(env)
+            按步数、仿真时间或条件调度的步进事件参见 add_step_event.
+        snapshot_mode: 互操作镜像的生成方式.
+            'buffer' : 双缓冲镜像，保护属性写入预分配缓冲区，每步交换（默认）.
+            'copy' : 每步对活动实体整体深拷贝.
+        index_cell_size: 近邻索引的网格边长[可选].
+            默认取活动实体中最大的互操作半径.
+        access_kernels: 批量互操作核列表.
+            互操作核原型 access_kernel(entities, mirrors, index)，参见 kernel.AccessKernel.
+            index 为本步需要更新（接收计算结果）的实体序号.
+        chunk_size: 并行执行时每个任务包含的实体数[可选]. 参见 set_workers.
+        profiler: 性能统计[可选]. 参见 profiler.StepProfiler.
+        integrator: 积分器[可选]. 参见 integrate.Integrator.
     """
 
     def __init__(self):
-        self._entities = []  # List[Entity]
+        self._entities = {}  # Dict[int, Entity]，按加入顺序排列.
+        self._names = {}  # Dict[str, Dict[int, Entity]]，名字索引.
+        self._ranks = {}  # Dict[int, int]，实体的加入序号.
+        self._added = count()  # 加入序号计数器.
+        self._active = {}  # Dict[int, Entity]，活动实体.
+        self._active_list = []  # List[Entity]，活动实体列表（按加入顺序）.
+        self._active_ranks = []  # List[int]，活动实体的加入序号（与 _active_list 对应）.
+        self._active_shared = False  # 活动实体列表是否已交给本步使用（修改前需拷贝）.
+        self._polled = {}  # Dict[int, Entity]，重写了 is_active 的实体，每步检查活动状态.
+        self._mirror_owners = {}  # Dict[int, Entity]，重写了 update_mirrors 的实体.
+        self._managed = 0  # 由所属实体管理的实体数量.
+        self._stepped = None  # List[int]，不受管理的活动实体的序号缓存.
+        self._interactions = {}  # Dict[str, FrozenSet[str]]，分组互操作矩阵.
+        self._targets = None  # Tuple[List[Entity], Dict[str, List[int]]]，各分组的互操作对象序号缓存.
+        self._pair_handlers = []  # List[Tuple[handler, groups, radius]]
+        self._scheduled = []  # List[_ScheduledEvent]，按加入顺序排列.
+        self._tick_queue = []  # List[Tuple[int, int, _ScheduledEvent]]，按步数调度的事件（堆）.
+        self._time_queue = []  # List[Tuple[float, int, _ScheduledEvent]]，按仿真时间调度的事件（堆）.
+        self._watchers = []  # List[_ScheduledEvent]，每步检查条件的事件.
+        self._sequence = count()  # 调度序号，同一时刻按加入顺序处理.
+        self._mirrors = {}  # Dict[int, _Mirror]
+        self._updated = {}  # Dict[int, int]，更新周期大于 1 的实体上次更新时的步数.
+        self._elapsed = {}  # Dict[int, float]，本步更新的、更新周期大于 1 的实体的步进时间.
+        self._previous_tick = None  # 上一步的步数（重置后为 None）.
         self._clock = _SimClock()
         self.step_events = []
+        self.snapshot_mode = 'buffer'
+        self.index_cell_size = None
+        self.access_kernels = []
+        self.chunk_size = None
+        self._executor = None  # ThreadPoolExecutor
+        self._workers = 0
+        self.profiler = None
+        self.integrator = None
+        self._context = None  # Tuple[List[Entity], List[Entity]]，本步的活动实体和镜像.
 
     def run(self, **kwargs):
         """ 连续运行. """
@@ -110,46 +330,112 @@ class Environment(object):
         while not self.is_over():
             self.step()
 
+    async def arun(self, **kwargs):
+        """ 在 asyncio 事件循环中连续运行. 参见 astep. """
+        self.reset(**kwargs)
+        while not self.is_over():
+            await self.astep()
+
     def reset(self, **kwargs):
         """ 重置. """
         self._clock.set_values(**kwargs)
         self._clock.reset()
-        for obj in self._entities:
+        self._updated, self._elapsed, self._previous_tick = {}, {}, None
+        for obj in list(self._entities.values()):
             obj.reset()
+        self._reschedule()
 
     def step(self) -> bool:
         """ 步进. """
-        time_info = self.time_info
-        active_entities = [obj for obj in self._entities if obj.is_active()]
+        self._step_entities()
+        self._call_phase('step_events', self._step_events)
 
-        # 互操作.
-        mirror_entities = copy.deepcopy(active_entities)
-        for obj in active_entities:
-            others = [other for other in mirror_entities if other.id != obj.id]
-            obj.access(others)
+        # 时钟步进.
+        self._call_phase('clock', self._clock.step)
+        return self.is_over()
 
-        # 状态步进.
-        for obj in active_entities:
-            obj.step(time_info)
+    async def astep(self) -> bool:
+        """ 在 asyncio 事件循环中步进.
 
-        # 处理步进事件.
-        for obj in active_entities:
-            obj.on_step()
-        for evt in self.step_events:
-            evt(self)
+        与 step 相同，区别在于：环境步进事件可以是协程函数（返回可等待对象）；
+        时钟步进时让出事件循环，实时仿真以 asyncio.sleep 等待.
+        因此仿真可以与网络 I/O 等任务在同一个事件循环中运行.
+        """
+        self._step_entities()
+        await self._acall_phase('step_events', self._astep_events)
 
         # 时钟步进.
-        self._clock.step()
+        await self._acall_phase('clock', self._clock.astep)
         return self.is_over()
 
+    def _step_entities(self):
+        """ 实体互操作、步进和处理步进事件. """
+        time_info, profiler = self.time_info, self.profiler
+        phase = self._call_phase
+        active_entities, due = self._schedule()
+        if self._managed:
+            # 受管理的实体由所属实体步进，不单独执行互操作.
+            if len(due) == len(active_entities):
+                if self._stepped is None:
+                    self._stepped = [i for i, obj in enumerate(active_entities)
+                                     if not obj.managed]
+                due = self._stepped
+            else:
+                due = [i for i in due if not active_entities[i].managed]
+        due_entities = active_entities if len(due) == len(active_entities) \
+            else [active_entities[i] for i in due]
+
+        # 互操作.
+        mirror_entities = phase('snapshot', self._snapshot, active_entities, due_entities)
+        self._context = (active_entities, mirror_entities)
+        phase('access', self._access, active_entities, mirror_entities, due)
+        phase('pair', self._access_pairs, active_entities, mirror_entities, due)
+        phase('kernel', self._access_kernels, active_entities, mirror_entities, due)
+
+        # 状态步进.
+        if self.integrator is not None:
+            phase('integrate', self._integrate, time_info, due_entities)
+        self._context = None
+        phase('step', self._run_phase,
+              functools.partial(_step_entities, time_info, profiler, self._elapsed), due_entities)
+
+        # 处理步进事件.
+        phase('on_step', self._run_phase,
+              functools.partial(_on_step_entities, profiler), due_entities)
+
     def is_over(self) -> bool:
         """ 判断是否结束. """
         return self._clock.is_over()
 
+    def set_workers(self, workers: int, chunk_size=None):
+        """ 设置并行执行的线程数.
+
+        设置后，互操作、步进和实体步进事件三个阶段分别将活动实体分块，
+        在线程池中并行执行，各阶段之间等待全部完成. 互操作只读取镜像、
+        只修改自身，因此各实体之间互不影响；处理函数需要保证不修改其他实体.
+        环境步进事件和互操作核仍在主线程中执行.
+        处理函数以释放 GIL 的 NumPy 运算为主时可以获得加速；
+        在无 GIL（free-threaded）的 Python 构建上可以充分利用多核.
+
+        :param workers: 线程数. 为 0 时关闭线程池，恢复顺序执行.
+        :param chunk_size: 每个任务包含的实体数. 默认按线程数均分.
+        """
+        self.close()
+        self.chunk_size = chunk_size
+        if workers > 0:
+            self._workers = int(workers)
+            self._executor = ThreadPoolExecutor(max_workers=self._workers)
+
+    def close(self):
+        """ 关闭线程池. """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor, self._workers = None, 0
+
     @property
     def entities(self):
         """ 仿真环境中实体列表. """
-        return self._entities
+        return list(self._entities.values())
 
     def add(self, obj: Entity):
         """ 添加仿真实体. 
@@ -157,22 +443,42 @@ class Environment(object):
         :param obj: 需要加入环境的仿真实体.
         :return: 已经加入环境的仿真实体.
         """
-        if self.find(obj) is None:
-            obj.attach(self)
-            self._entities.append(obj)
-            return obj
-        return None
+        if obj.id in self._entities:
+            return None
+        self._entities[obj.id] = obj
+        self._ranks[obj.id] = next(self._added)
+        self._index_name(obj, obj.name)
+        if type(obj).is_active is not BaseEntity.is_active:
+            self._polled[obj.id] = obj
+        if type(obj).update_mirrors is not BaseEntity.update_mirrors:
+            self._mirror_owners[obj.id] = obj
+        if obj.managed:
+            self._managed += 1
+        if obj.is_active():
+            self._set_active(obj, True)
+        obj.attach(self)
+        return obj
 
     def remove(self, obj_tag):
         """ 删除仿真实体. 
 
         :param obj_tag: 仿真实体的标签，对象 | ID | Name
         """
-        for i, obj in enumerate(self._entities):
-            if self._compare_obj_tag(obj, obj_tag):
-                obj.attach(None)
-                del self._entities[i]
-                break
+        obj = self.find(obj_tag)
+        if obj is not None:
+            self._set_active(obj, False)
+            del self._entities[obj.id]
+            del self._ranks[obj.id]
+            self._polled.pop(obj.id, None)
+            self._mirror_owners.pop(obj.id, None)
+            if obj.managed:
+                self._managed -= 1
+            self._unindex_name(obj, obj.name)
+            self._mirrors.pop(obj.id, None)
+            self._updated.pop(obj.id, None)
+            if self._scheduled:
+                self._drop_events(lambda event: event.entity is obj)
+            obj.attach(None)
 
     def find(self, obj_tag) -> Entity:
         """ 查找仿真实体.
@@ -180,32 +486,740 @@ class Environment(object):
         :param obj_tag: 仿真实体的标签，对象 | ID | Name
         :return: 如果找到，返回仿真实体；否则返回 None.         
         """
-        for obj in self._entities:
-            if self._compare_obj_tag(obj, obj_tag):
-                return obj
+        if isinstance(obj_tag, BaseEntity):
+            obj = self._entities.get(obj_tag.id)
+            return obj if obj is obj_tag else None
+        if isinstance(obj_tag, int):
+            return self._entities.get(obj_tag)
+        if isinstance(obj_tag, str) and obj_tag != '':
+            objs = self._names.get(obj_tag)
+            return next(iter(objs.values())) if objs else None
         return None
 
+    def find_all(self, name: str) -> List[Entity]:
+        """ 查找所有同名的仿真实体.
+
+        :param name: 实体名字.
+        :return: 实体列表，按加入顺序排列.
+        """
+        objs = self._names.get(name)
+        return list(objs.values()) if objs else []
+
     @property
     def time_info(self):
         return self._clock.time_info
 
-    def _compare_obj_tag(self, obj, obj_tag) -> bool:
-        """ 检查对象和标签是否相符 """
-        if isinstance(obj_tag, Entity):
-            return obj is obj_tag
-        if isinstance(obj_tag, int):
-            return obj.id == obj_tag
-        if isinstance(obj_tag, str) and obj_tag != '':
-            return obj.name == obj_tag
-        return False
+    @property
+    def clock(self) -> '_SimClock':
+        """ 仿真时钟. """
+        return self._clock
+
+    def set_interaction(self, group: str, targets=None):
+        """ 设置分组之间的互操作关系.
+
+        声明后，group 分组中的实体只与 targets 分组中的实体互操作，
+        环境按分组维护活动实体的序号，不再遍历其他实体.
+        未声明的分组仍与全部实体互操作. 互操作核不受分组限制.
+
+        :param group: 分组名称（Entity.group）. 未分组的实体为 None.
+        :param targets: 互操作对象的分组名称列表. 为 None 时取消声明.
+        """
+        if targets is None:
+            self._interactions.pop(group, None)
+        else:
+            self._interactions[group] = frozenset(targets)
+        self._targets = None
+
+    def add_pair_handler(self, handler, groups=None, radius: float = None):
+        """ 添加成对互操作处理函数.
+
+        每一对（无序）活动实体只调用一次，适用于作用与反作用对称的规律，
+        处理函数原型 handler(a, b, a_prev, b_prev)：
+            a, b : 两个实体（写入对象）. 本步不更新的一方（参见 update_period）为 None.
+            a_prev, b_prev : 两个实体的步进前镜像（读取对象）.
+        成对互操作在实体互操作之后、互操作核之前，在主线程中执行.
+
+        :param handler: 处理函数.
+        :param groups: 分组 (group_a, group_b)[可选]. 设置后 a、b 分别属于这两个分组.
+            默认为全部活动实体两两配对.
+        :param radius: 作用半径[可选]. 设置后只处理按 position_prop 距离不超过 radius 的实体对
+            （没有位置属性的实体不参与）.
+        """
+        self._pair_handlers.append((handler, None if groups is None else tuple(groups), radius))
+
+    def remove_pair_handler(self, handler):
+        """ 删除成对互操作处理函数. """
+        self._pair_handlers = [item for item in self._pair_handlers if item[0] is not handler]
+
+    def add_step_event(self, evt, entity: Entity = None, every: int = None,
+                       interval: float = None, when=None):
+        """ 添加由环境调度的步进事件.
+
+        与 step_events 列表不同，事件只在到期（且条件改变）时调用；
+        未到期的事件保存在按到期步数或时刻排序的堆中，不参与每步的遍历.
+        步进事件在实体和环境的步进事件列表之后处理.
+
+        :param evt: 步进事件. 原型 evt(entity)，未指定实体时为 evt(env).
+        :param entity: 实体[可选]. 实体不活动时不调用，移出环境后事件自动删除.
+        :param every: 每隔 every 步调用一次[可选]. 在步数为 every 的整数倍时调用.
+        :param interval: 每隔 interval 仿真时间调用一次[可选]. 与 every 不能同时设置.
+            在不早于起始时刻加 interval 整数倍的第一步调用.
+        :param when: 条件函数[可选]. 原型 when(entity) 或 when(env).
+            只在条件值（按真假）与上次检查时不同时调用（初始视为假），
+            即条件成立和不再成立时各调用一次. 与 every 或 interval 同时设置时
+            只在到期时检查条件，否则每步检查.
+        """
+        if every is not None and interval is not None:
+            raise ValueError('Cannot set both every and interval.')
+        if every is not None and int(every) < 1:
+            raise ValueError('every must be a positive integer.')
+        if interval is not None and not interval > 0:
+            raise ValueError('interval must be positive.')
+        event = _ScheduledEvent(evt, entity, None if every is None else int(every),
+                                None if interval is None else float(interval), when,
+                                next(self._sequence))
+        self._scheduled.append(event)
+        self._schedule_event(event)
+
+    def remove_step_event(self, evt):
+        """ 删除由环境调度的步进事件（evt 的全部调度）. """
+        self._drop_events(lambda event: event.evt is evt)
+
+    def get_state(self) -> dict:
+        """ 环境状态：时钟状态和调度事件的条件状态（参见 checkpoint）. """
+        return {'clock': self._clock.get_state(),
+                'events': [event.state for event in self._scheduled]}
+
+    def set_state(self, state: dict):
+        """ 恢复环境状态，并从恢复后的时刻起重新调度事件.
+
+        调度事件的条件状态按加入顺序恢复（数量不一致时忽略）.
+        """
+        if 'clock' in state:
+            self._clock.set_state(state['clock'])
+        self._reschedule()
+        events = state.get('events')
+        if events is not None and len(events) == len(self._scheduled):
+            for event, value in zip(self._scheduled, events):
+                event.state = bool(value)
+
+    def _drop_events(self, match):
+        """ 删除满足 match(event) 的调度事件. 堆中的条目在出堆时丢弃. """
+        for event in self._scheduled:
+            if match(event):
+                event.removed = True
+        self._scheduled = [event for event in self._scheduled if not event.removed]
+        self._watchers = [event for event in self._watchers if not event.removed]
+
+    def evaluate_access(self, entities: List[Entity]):
+        """ 按实体的当前状态重新执行互操作.
+
+        只能在步进过程中（积分器内）调用. 先以实体的当前状态更新其镜像，
+        再让这些实体与全部活动实体的镜像互操作（含互操作核），
+        结果累加至实体自身. 积分器用以计算中间状态的作用量.
+
+        :param entities: 需要重新互操作的活动实体.
+        """
+        if self._context is None:
+            raise RuntimeError('evaluate_access is only available during step.')
+        active, mirrors = self._context
+        position = {obj.id: i for i, obj in enumerate(active)}
+        index = [position[obj.id] for obj in entities]
+        for i in index:
+            mirrors[i] = self._mirror(active[i])
+        self._access(active, mirrors, index)
+        self._access_pairs(active, mirrors, index)
+        self._access_kernels(active, mirrors, index)
+
+    def _integrate(self, time_info, entities: List[Entity]):
+        """ 由积分器推进实体状态（按步进时间分组）. """
+        integrator = self.integrator
+        groups = {}
+        elapsed = self._elapsed
+        for obj in entities:
+            if integrator.select(obj):
+                dt = time_info[1] if obj.update_period == 1 else \
+                    elapsed.get(obj.id, time_info[1] * obj.update_period)
+                groups.setdefault(dt, []).append(obj)
+        for dt, objs in groups.items():
+            integrator.integrate(self, objs, dt)
+
+    def _schedule(self) -> Tuple[List[Entity], List[int]]:
+        """ 确定本步的活动实体，以及其中需要更新的实体.
+
+        :return: (活动实体列表, 需要更新的实体在活动实体列表中的序号).
+        """
+        for obj in self._polled.values():
+            if bool(obj.is_active()) != (obj.id in self._active):
+                self._set_active(obj, obj.id not in self._active)
+        active = self._active_list
+        self._active_shared = True
+        clock = self._clock
+        tick = clock.ticks
+        previous = tick - 1 if self._previous_tick is None else self._previous_tick
+        self._previous_tick = tick
+        updated, elapsed = self._updated, {}
+        self._elapsed = elapsed
+        if tick == 0:
+            for obj in active:
+                if obj.update_period != 1:
+                    updated[obj.id] = 0
+            return active, range(len(active))
+        # 实体在上一步之后、本步及之前的步数到达更新周期的整数倍时更新
+        # （实时仿真丢弃步数时，不会错过更新），步进时间为距上次更新的实际时间.
+        step = clock.step_size
+        due = []
+        for i, obj in enumerate(active):
+            period = obj.update_period
+            if period == 1:
+                due.append(i)
+            elif tick // period > previous // period:
+                due.append(i)
+                last = updated.get(obj.id)
+                elapsed[obj.id] = (period if last is None else tick - last) * step
+                updated[obj.id] = tick
+        return active, due
+
+    def _set_active(self, obj: Entity, active: bool):
+        """ 实体活动状态改变时更新活动实体集合.
+
+        活动实体列表按加入序号二分插入或删除. 列表交给步进使用后，
+        第一次修改前先拷贝（整块拷贝），步进过程中使用的列表保持不变.
+        """
+        if self._entities.get(obj.id) is not obj:
+            return
+        active = bool(active)
+        if active == (obj.id in self._active):
+            return
+        if self._active_shared:
+            self._active_list = list(self._active_list)
+            self._active_shared = False
+        self._stepped = None
+        ranks, rank = self._active_ranks, self._ranks[obj.id]
+        k = bisect_left(ranks, rank)
+        if active:
+            self._active[obj.id] = obj
+            self._active_list.insert(k, obj)
+            ranks.insert(k, rank)
+        else:
+            del self._active[obj.id]
+            del self._active_list[k]
+            del ranks[k]
+            self._updated.pop(obj.id, None)
+
+    def _access(self, entities: List[Entity], mirrors: List[Entity], index: List[int]):
+        """ 实体互操作.
+
+        设置了互操作半径的实体，通过近邻索引获取范围内的镜像；
+        其他实体获取全部其他镜像.
+
+        :param index: 需要执行互操作的实体序号.
+        """
+        if mirrors is None:
+            return
+        neighbors = None
+        if any(entities[i].interaction_radius is not None for i in index):
+            neighbors = NeighborIndex(mirrors, self._index_cell_size(entities))
+        groups = (self._interactions, self._group_targets(entities)) \
+            if self._interactions else None
+        self._run_phase(functools.partial(_access_entities, entities, mirrors, neighbors,
+                                          groups, self.profiler), index)
+
+    def _group_targets(self, entities: List[Entity]):
+        """ 各声明分组的互操作对象在活动实体列表中的序号（有序）.
+
+        按分组将活动实体分桶，结果在活动实体和分组不变时复用.
+        """
+        if self._targets is not None and self._targets[0] is entities:
+            return self._targets[1]
+        buckets = {}
+        for i, obj in enumerate(entities):
+            buckets.setdefault(obj.group, []).append(i)
+        targets = {}
+        for group, names in self._interactions.items():
+            targets[group] = sorted(chain.from_iterable(buckets.get(name, ())
+                                                        for name in names))
+        self._targets = (entities, targets)
+        return targets
+
+    def _access_pairs(self, entities: List[Entity], mirrors: List[Entity], index: List[int]):
+        """ 执行成对互操作. index 为需要更新的实体序号. """
+        if not self._pair_handlers or not len(index):
+            return
+        due = None
+        if len(index) != len(entities):
+            due = [False] * len(entities)
+            for i in index:
+                due[i] = True
+        profiler = self.profiler
+        for handler, groups, radius in self._pair_handlers:
+            t = time.perf_counter()
+            for i, j in _pair_indices(mirrors, groups, radius):
+                if due is None:
+                    handler(entities[i], entities[j], mirrors[i], mirrors[j])
+                elif due[i] or due[j]:
+                    handler(entities[i] if due[i] else None, entities[j] if due[j] else None,
+                            mirrors[i], mirrors[j])
+            if profiler is not None:
+                profiler.add(('pair', '', _handler_name(handler)), time.perf_counter() - t)
+
+    def _access_kernels(self, entities: List[Entity], mirrors: List[Entity],
+                        index: List[int]):
+        """ 执行互操作核. """
+        profiler = self.profiler
+        if not index:
+            return
+        for kernel in self.access_kernels:
+            if profiler is None:
+                kernel(entities, mirrors, index)
+            else:
+                profiler.call(('kernel', '', type(kernel).__name__), kernel,
+                              entities, mirrors, index)
+
+    def _step_events(self):
+        """ 处理环境步进事件. """
+        profiler = self.profiler
+        for evt in self.step_events:
+            if profiler is None:
+                evt(self)
+            else:
+                profiler.call(('step_events', '', _handler_name(evt)), evt, self)
+        if not self._scheduled:
+            return
+        for event in self._due_events():
+            if event.removed:
+                continue
+            target = self if event.entity is None else event.entity
+            if profiler is None:
+                event.evt(target)
+            else:
+                profiler.call(event.key, event.evt, target)
+
+    async def _astep_events(self):
+        """ 处理环境步进事件，等待协程事件完成. """
+        profiler = self.profiler
+        for evt in self.step_events:
+            t = time.perf_counter()
+            ret = evt(self)
+            if inspect.isawaitable(ret):
+                await ret
+            if profiler is not None:
+                profiler.add(('step_events', '', _handler_name(evt)), time.perf_counter() - t)
+        if not self._scheduled:
+            return
+        for event in self._due_events():
+            if event.removed:
+                continue
+            t = time.perf_counter()
+            ret = event.evt(self if event.entity is None else event.entity)
+            if inspect.isawaitable(ret):
+                await ret
+            if profiler is not None:
+                profiler.add(event.key, time.perf_counter() - t)
+
+    def _schedule_event(self, event: '_ScheduledEvent'):
+        """ 将事件放入调度队列. 到期步数或时刻从时钟的当前步数（时刻）起，
+        对齐至 every 的整数倍（起始时刻加 interval 的整数倍）.
+        """
+        clock = self._clock
+        if event.every is not None:
+            ticks = -(-clock.ticks // event.every) * event.every
+            heapq.heappush(self._tick_queue, (ticks, next(self._sequence), event))
+        elif event.interval is not None:
+            start, interval = clock.get_state()['start'], event.interval
+            count = np.ceil((clock.time_info[0] - start) / interval - 1e-9)
+            heapq.heappush(self._time_queue,
+                           (start + count * interval, next(self._sequence), event))
+        else:
+            self._watchers.append(event)
+
+    def _reschedule(self):
+        """ 按时钟的当前步数重新调度全部事件，并清除条件状态. """
+        self._tick_queue, self._time_queue, self._watchers = [], [], []
+        for event in self._scheduled:
+            event.state = False
+            self._schedule_event(event)
+
+    def _due_events(self) -> List['_ScheduledEvent']:
+        """ 本步到期的事件，按加入顺序排列. 到期的事件随即调度下一次. """
+        clock = self._clock
+        ticks, t = clock.ticks, clock.time_info[0]
+        due = []
+        queue = self._tick_queue
+        while queue and queue[0][0] <= ticks:
+            _, _, event = heapq.heappop(queue)
+            if not event.removed:
+                due.append(event)
+                heapq.heappush(queue, (ticks + event.every, next(self._sequence), event))
+        queue, tolerance = self._time_queue, 1e-9 * clock.step_size
+        while queue and queue[0][0] <= t + tolerance:
+            due_time, _, event = heapq.heappop(queue)
+            if not event.removed:
+                due.append(event)
+                # 步长大于 interval 时跳过错过的时刻.
+                due_time += event.interval
+                if due_time <= t + tolerance:
+                    due_time = t + event.interval
+                heapq.heappush(queue, (due_time, next(self._sequence), event))
+        if due:
+            due.extend(self._watchers)
+            due.sort(key=lambda event: event.order)
+        else:
+            due = self._watchers
+        ready = []
+        for event in due:
+            entity = event.entity
+            if entity is not None and not entity.is_active():
+                continue
+            if event.when is not None:
+                state = bool(event.when(self if entity is None else entity))
+                if state == event.state:
+                    continue
+                event.state = state
+            ready.append(event)
+        return ready
+
+    async def _acall_phase(self, name: str, func, *args):
+        """ 执行步进的一个阶段（协程），设置了性能统计时记录耗时. """
+        if self.profiler is None:
+            return await func(*args)
+        t = time.perf_counter()
+        ret = await func(*args)
+        self.profiler.add(('phase', name, ''), time.perf_counter() - t)
+        return ret
+
+    def _call_phase(self, name: str, func, *args):
+        """ 执行步进的一个阶段，设置了性能统计时记录耗时. """
+        if self.profiler is None:
+            return func(*args)
+        return self.profiler.call(('phase', name, ''), func, *args)
+
+    def _run_phase(self, func, items):
+        """ 执行一个阶段.
+
+        未设置线程池时直接执行 func(items)；否则将 items 分块并行执行，
+        等待全部完成后返回.
+        """
+        executor = self._executor
+        if executor is None or len(items) < 2:
+            func(items)
+            return
+        size = self.chunk_size or -(-len(items) // self._workers)
+        futures = [executor.submit(func, items[i:i + size])
+                   for i in range(0, len(items), size)]
+        for future in futures:
+            future.result()
+
+    def _index_cell_size(self, entities: List[Entity]) -> float:
+        """ 近邻索引的网格边长. """
+        if self.index_cell_size is not None:
+            return self.index_cell_size
+        return max(obj.interaction_radius for obj in entities
+                   if obj.interaction_radius is not None) or 1.
+
+    def _snapshot(self, entities: List[Entity], readers: List[Entity] = None) -> List[Entity]:
+        """ 生成实体镜像，即实体在本次步进之前的状态.
+
+        没有读取镜像的对象（实体互操作处理函数、成对互操作、互操作核、积分器）时
+        不生成镜像，返回 None.
+
+        :param entities: 需要生成镜像的实体列表.
+        :param readers: 本步执行互操作的实体[可选]. 默认为 entities.
+        :return: 镜像列表，与 entities 一一对应.
+        """
+        if not (self._pair_handlers or self.access_kernels or self.integrator is not None
+                or any(_accesses(obj) for obj in (entities if readers is None else readers))):
+            return None
+        if self.snapshot_mode == 'copy':
+            return copy.deepcopy(entities)
+        for owner in self._mirror_owners.values():
+            owner.update_mirrors()
+        mirror = self._mirror
+        return [obj.mirror if obj.managed else mirror(obj) for obj in entities]
+
+    def _mirror(self, obj: Entity) -> Entity:
+        """ 生成单个实体的镜像. """
+        if self.snapshot_mode == 'copy' or type(obj).__deepcopy__ is not BaseEntity.__deepcopy__:
+            # 自定义了拷贝语义的实体，仍采用深拷贝.
+            return copy.deepcopy(obj)
+        if obj.managed:
+            return obj.mirror
+        if not obj.protect_props and isinstance(obj, CompactEntity):
+            return obj
+        mirror = self._mirrors.get(obj.id)
+        if mirror is None:
+            mirror = self._mirrors[obj.id] = _Mirror(obj)
+        return mirror.update(obj)
+
+    def _index_name(self, obj: Entity, name: str):
+        """ 加入名字索引. """
+        if name:
+            self._names.setdefault(name, {})[obj.id] = obj
+
+    def _unindex_name(self, obj: Entity, name: str):
+        """ 移出名字索引. """
+        objs = self._names.get(name)
+        if objs is not None:
+            objs.pop(obj.id, None)
+            if not objs:
+                del self._names[name]
+
+    def _regroup(self, obj: Entity):
+        """ 实体分组改变时更新分组索引. """
+        if self._entities.get(obj.id) is obj:
+            self._targets = None
+
+    def _rename(self, obj: Entity, name: str):
+        """ 实体改名时更新名字索引. """
+        if self._entities.get(obj.id) is not obj:
+            return  # 镜像等不在环境中的对象.
+        self._unindex_name(obj, obj.name)
+        self._index_name(obj, name)
+
+
+def _access_entities(entities: List[Entity], mirrors: List[Entity], neighbors, groups,
+                     profiler, index):
+    """ 互操作. index 为需要执行的实体序号.
+
+    groups 为 (分组互操作矩阵, 各分组的互操作对象序号)，未设置分组时为 None.
+    """
+    for i in index:
+        obj = entities[i]
+        if not _accesses(obj):
+            continue
+        names = None if groups is None else groups[0].get(obj.group)
+        if obj.interaction_radius is None:
+            others = _Others(mirrors, i, None if names is None else groups[1][obj.group])
+        else:
+            others = neighbors.query(mirrors[i], obj.interaction_radius)
+            if names is not None:
+                others = [other for other in others if other.group in names]
+        if profiler is None:
+            obj.access(others)
+        else:
+            profiler.access(obj, others)
+
+
+def _accesses(obj: Entity) -> bool:
+    """ 实体是否与其他实体互操作（重写了 access 或者有互操作处理函数）. """
+    access = type(obj).access
+    if access is BaseEntity.access:
+        return bool(obj.access_handlers)
+    if access is CompactEntity.access:
+        handlers = obj._access_handlers
+        return bool(obj.default_access_handlers if handlers is None else handlers)
+    return True
+
+
+def _pair_indices(mirrors: List[Entity], groups, radius: float):
+    """ 生成成对互操作的实体序号对 (i, j).
+
+    未分组或两个分组相同时 i < j；否则 i 属于 groups[0]，j 属于 groups[1].
+    """
+    if groups is None:
+        first = second = range(len(mirrors))
+    else:
+        first = [i for i, obj in enumerate(mirrors) if obj.group == groups[0]]
+        second = first if groups[1] == groups[0] else \
+            [i for i, obj in enumerate(mirrors) if obj.group == groups[1]]
+    same = first is second
+    if radius is None:
+        return combinations(first, 2) if same else product(first, second)
+
+    def positions(index):
+        items = [(i, getattr(mirrors[i], mirrors[i].position_prop, None)) for i in index]
+        return [(i, pos) for i, pos in items if pos is not None]
+
+    first = positions(first)
+    second = first if same else positions(second)
+    grid = UniformGrid(radius if radius > 0. else 1.)
+    grid.build([pos for _, pos in second])
+    pairs = []
+    for k, (i, pos) in enumerate(first):
+        for m in grid.query(pos, radius):
+            if not same or m > k:
+                pairs.append((i, second[m][0]))
+    return pairs
+
+
+class _Others(object):
+    """ 除指定序号之外的其他镜像（只读视图，不复制列表）.
+
+    指定 indices（有序序号列表）时，只包含其中的镜像.
+    """
+
+    __slots__ = ('_items', '_skip', '_indices')
+
+    def __init__(self, items: List, skip: int, indices: List[int] = None):
+        self._items = items
+        self._skip = skip
+        if indices is not None:
+            pos = bisect_left(indices, skip)
+            if pos < len(indices) and indices[pos] == skip:
+                indices = _Others(indices, pos)
+        self._indices = indices
+
+    def __len__(self):
+        if self._indices is not None:
+            return len(self._indices)
+        return len(self._items) - 1
+
+    def __iter__(self):
+        items, skip = self._items, self._skip
+        if self._indices is not None:
+            return map(items.__getitem__, self._indices)
+        return chain(islice(items, skip), islice(items, skip + 1, None))
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return list(self)[key]
+        if self._indices is not None:
+            return self._items[self._indices[key]]
+        n = len(self)
+        if key < 0:
+            key += n
+        if not 0 <= key < n:
+            raise IndexError('index out of range')
+        return self._items[key + 1 if key >= self._skip else key]
+
+
+class _ScheduledEvent(object):
+    """ 由环境调度的步进事件. 参见 Environment.add_step_event. """
+
+    __slots__ = ('evt', 'entity', 'every', 'interval', 'when', 'order', 'state', 'removed', 'key')
+
+    def __init__(self, evt, entity, every, interval, when, order: int):
+        self.evt = evt
+        self.entity = entity  # Entity[可选]
+        self.every = every
+        self.interval = interval
+        self.when = when
+        self.order = order  # 加入顺序.
+        self.state = False  # 条件的上次检查结果.
+        self.removed = False
+        # 性能统计的键.
+        self.key = ('step_events', '', _handler_name(evt)) if entity is None else \
+            ('on_step', type(entity).__name__, _handler_name(evt))
+
+
+def _step_entities(time_info, profiler, elapsed, entities: List[Entity]):
+    """ 实体步进. 更新周期大于 1 的实体，步进时间为距上次更新的时间（elapsed）. """
+    for obj in entities:
+        period = obj.update_period
+        ti = time_info if period == 1 else \
+            (time_info[0], elapsed.get(obj.id, time_info[1] * period))
+        if profiler is None:
+            obj.step(ti)
+        else:
+            profiler.step(obj, ti)
+
+
+def _on_step_entities(profiler, entities: List[Entity]):
+    """ 实体处理步进事件. """
+    for obj in entities:
+        if profiler is None:
+            obj.on_step()
+        else:
+            profiler.on_step(obj)
+
+
+def _handler_name(handler) -> str:
+    """ 处理函数名称. """
+    name = getattr(handler, '__qualname__', None) or getattr(handler, '__name__', None)
+    return name or type(handler).__name__
+
+
+class _Mirror(object):
+    """ 实体镜像（双缓冲）.
+
+    为实体保留前后两份镜像对象. 每次更新时，实体的保护属性写入后台镜像
+    预分配的缓冲区，然后交换前后台. 缓冲区在实体存续期间反复使用，
+    步进过程中不再为保护属性分配新的对象.
+    """
+
+    __slots__ = ('_front', '_back', '_front_buffers', '_back_buffers', '_slots')
+
+    def __init__(self, obj: Entity):
+        self._front, self._back = copy.copy(obj), copy.copy(obj)
+        self._front_buffers, self._back_buffers = {}, {}
+        self._slots = _slot_names(type(obj)) or None  # Tuple[str]
+
+    def update(self, obj: Entity) -> Entity:
+        """ 将实体当前状态写入后台镜像，并交换前后台.
+
+        :return: 更新后的镜像（前台）.
+        """
+        back, buffers = self._back, self._back_buffers
+        if self._slots is None:
+            back.__dict__.update(obj.__dict__)
+        else:
+            # 采用 __slots__ 的实体.
+            for name in self._slots:
+                value = getattr(obj, name, _MISSING)
+                if value is not _MISSING:
+                    setattr(back, name, value)
+            if hasattr(obj, '__dict__'):
+                back.__dict__.update(obj.__dict__)
+        for name in obj.protect_props:
+            if hasattr(obj, name):
+                buffer = _copy_into(buffers.get(name), getattr(obj, name))
+                buffers[name] = buffer
+                setattr(back, name, buffer)
+        self._front, self._back = back, self._front
+        self._front_buffers, self._back_buffers = buffers, self._front_buffers
+        return back
+
+
+_MISSING = object()
+_slots_cache = {}  # Dict[type, Tuple[str]]
+
+
+def _slot_names(cls) -> Tuple[str]:
+    """ 类及其基类以 __slots__ 声明的属性名称. """
+    names = _slots_cache.get(cls)
+    if names is None:
+        names = []
+        for klass in cls.__mro__:
+            slots = klass.__dict__.get('__slots__', ())
+            for name in (slots,) if isinstance(slots, str) else slots:
+                if name not in ('__dict__', '__weakref__'):
+                    names.append(name)
+        names = _slots_cache[cls] = tuple(names)
+    return names
+
+
+def _copy_into(buffer, value):
+    """ 将 value 拷贝至缓冲区.
+
+    形状和类型一致的数组直接原地拷贝；否则重新生成缓冲区.
+    """
+    if isinstance(value, np.ndarray):
+        if isinstance(buffer, np.ndarray) and buffer.shape == value.shape \
+                and buffer.dtype == value.dtype:
+            np.copyto(buffer, value)
+            return buffer
+        return value.copy()
+    return copy.deepcopy(value)
 
 
 class _SimClock(object):
     """ 仿真时钟. 
     
+    实时仿真时，按单调时钟（time.perf_counter）控制每一步的释放时刻：
+    第 k 步在首次步进后 k * step / time_scale 秒释放，误差不随时间累积.
+    等待时先睡眠，最后 spin 秒内忙等，以提高精度.
+
+    步进耗时超出预算（超时）时的处理方式 overrun：
+        'catch_up' : 保持原定时刻，后续步骤不再等待，直至追上（默认）.
+        'drop' : 跳过已错过的步，仿真时刻直接追至当前时刻，
+            下一步的步进时间为多个仿真步长.
+        'slow' : 以当前时刻重新计时，仿真整体滞后，保持步进节奏.
+
     TODO: 考虑运行时间的设置.
     """
 
+    OVERRUN_POLICIES = ('catch_up', 'drop', 'slow')
+
     def __init__(self, start=0., duration=10., step=0.1, realtime=False):
         """ 初始化时钟.
 
@@ -217,14 +1231,26 @@ class _SimClock(object):
         self._step = step
         self._range = [start, start + duration]
         self._now = 0.
+        self._dt = step
+        self._ticks = 0
 
         self.realtime = realtime
-        self._prev_t = None
+        self.time_scale = 1.
+        self.overrun = 'catch_up'
+        self.spin = 0.001
+        self._anchor = None  # 仿真起始时刻对应的实际时刻.
+        self._stats = {}
 
         self.reset()
 
     def set_values(self, **kwargs):
-        """ 设置参数值. """
+        """ 设置参数值.
+
+        除 step, start, duration, realtime 外，实时仿真参数：
+            time_scale : 仿真时间与实际时间的比例，如 2. 为两倍速.
+            overrun : 超时处理方式，'catch_up' | 'drop' | 'slow'.
+            spin : 等待结束前忙等的时长（秒），为 0 时只睡眠.
+        """
         if 'step' in kwargs:
             self._step = float(kwargs['step'])
         if 'start' in kwargs:
@@ -233,30 +1259,139 @@ class _SimClock(object):
             self._range[1] = self._range[0] + float(kwargs['duration'])
         if 'realtime' in kwargs:
             self.realtime = bool(kwargs['realtime'])
+        if 'time_scale' in kwargs:
+            if float(kwargs['time_scale']) <= 0.:
+                raise ValueError('time_scale must be positive.')
+            self.time_scale = float(kwargs['time_scale'])
+        if 'overrun' in kwargs:
+            if kwargs['overrun'] not in self.OVERRUN_POLICIES:
+                raise ValueError('Unknown overrun policy: %r.' % (kwargs['overrun'],))
+            self.overrun = kwargs['overrun']
+        if 'spin' in kwargs:
+            self.spin = max(float(kwargs['spin']), 0.)
 
     def reset(self):
         """ 重置. """
         self._now = self._range[0]
-        self._prev_t = None
+        self._dt = self._step
+        self._ticks = 0
+        self._anchor = None
+        self._stats = {'steps': 0, 'missed': 0, 'dropped': 0, 'max_overrun': 0.,
+                       'waits': 0, 'total_jitter': 0., 'max_jitter': 0.}
 
     def step(self) -> Tuple[float, float]:
         """ 步进. """
-        self._now += self._step
+        self._advance(1)
         self.wait_for_realtime()
         return self.time_info
 
+    async def astep(self) -> Tuple[float, float]:
+        """ 步进（协程）. 让出事件循环，实时仿真时以 asyncio.sleep 等待. """
+        self._advance(1)
+        deadline = self._pace()
+        if deadline is None:
+            await asyncio.sleep(0)
+        else:
+            await asyncio.sleep(max(deadline - time.perf_counter(), 0.))
+            self._record_jitter(deadline)
+        return self.time_info
+
     def wait_for_realtime(self):
         """ 同步. """
-        if self.realtime:
-            if self._prev_t is None:
-                self._prev_t = time.time()
-            else:
-                real_t = time.time() - self._prev_t
-                # dt = self._step - real_t
-                dt = (self._now - self._range[0]) - real_t
-                if dt > 0.:
-                    time.sleep(dt)
-                # self._prev_t = time.time()
+        deadline = self._pace()
+        if deadline is not None:
+            _sleep_until(deadline, self.spin)
+            self._record_jitter(deadline)
+
+    def _pace(self) -> float:
+        """ 实时仿真时，确定本步的释放时刻，并按超时处理方式调整.
+
+        :return: 需要等待至的时刻（time.perf_counter）；无需等待时返回 None.
+        """
+        if not self.realtime:
+            return None
+        now = time.perf_counter()
+        if self._anchor is None:
+            # 从首次步进完成时开始计时.
+            self._anchor = now - (self._now - self._range[0] - self._step) / self.time_scale
+        stats = self._stats
+        stats['steps'] += 1
+        deadline = self._deadline()
+        lag = now - deadline
+        if lag > 0.:
+            stats['missed'] += 1
+            stats['max_overrun'] = max(stats['max_overrun'], lag)
+            if self.overrun != 'drop':
+                if self.overrun == 'slow':
+                    self._anchor += lag
+                return None
+            count = int(lag * self.time_scale / self._step) + 1
+            stats['dropped'] += count
+            self._advance(count)
+            self._dt += count * self._step
+            deadline = self._deadline()
+        return deadline
+
+    def _record_jitter(self, deadline: float):
+        """ 统计等待结束时刻相对释放时刻的延迟. """
+        stats = self._stats
+        jitter = time.perf_counter() - deadline
+        stats['waits'] += 1
+        stats['total_jitter'] += jitter
+        stats['max_jitter'] = max(stats['max_jitter'], jitter)
+
+    @property
+    def stats(self) -> dict:
+        """ 实时仿真统计.
+
+        steps : 实时步进次数.
+        missed : 超时（错过释放时刻）的次数.
+        dropped : 跳过的步数（overrun 为 'drop' 时）.
+        max_overrun : 最大超时（秒）.
+        mean_jitter, max_jitter : 等待结束时刻相对释放时刻的平均、最大延迟（秒）.
+        """
+        stats = dict(self._stats)
+        waits, total = stats.pop('waits'), stats.pop('total_jitter')
+        stats['mean_jitter'] = total / waits if waits else 0.
+        return stats
+
+    def get_state(self) -> dict:
+        """ 时钟状态：起止时刻、步长、步数和本步的步长（参见 checkpoint）. """
+        return {'start': self._range[0], 'end': self._range[1], 'step': self._step,
+                'ticks': self._ticks, 'dt': self._dt}
+
+    def set_state(self, state: dict):
+        """ 恢复时钟状态：按起止时刻和步长重置，然后前进至 ticks 步. """
+        start = state['start']
+        self.set_values(start=start, duration=state['end'] - start, step=state['step'])
+        self.reset()
+        self._advance(int(state['ticks']))
+        self._dt = state['dt']
+
+    def _advance(self, count: int):
+        """ 前进 count 步. 仿真时刻由步数计算，不累积舍入误差. """
+        self._ticks += count
+        self._now = self._range[0] + self._ticks * self._step
+        self._dt = self._step
+
+    def _deadline(self) -> float:
+        """ 当前仿真时刻的释放时刻. """
+        return self._anchor + (self._now - self._range[0]) / self.time_scale
+
+    @property
+    def ticks(self) -> int:
+        """ 从起始时刻开始的步数. """
+        return self._ticks
+
+    @property
+    def step_size(self) -> float:
+        """ 仿真步长. """
+        return self._step
+
+    @property
+    def num_steps(self) -> int:
+        """ 从起始到结束的步数. """
+        return int(round((self._range[1] - self._range[0]) / self._step))
 
     def is_over(self) -> bool:
         """ 判断时钟是否结束. """
@@ -270,4 +1405,13 @@ class _SimClock(object):
         :return: Tuple[ 当前时刻，步进时间（从上一步到当前时刻）]
                 当前时刻等于起始时，步进时间为 0；其他时间的步进为仿真步长.
         """
-        return (self._now, self._step) if self._now > self._range[0] else (self._now, 0.)
+        return (self._now, self._dt) if self._now > self._range[0] else (self._now, 0.)
+
+
+def _sleep_until(deadline: float, spin: float):
+    """ 等待至 deadline（time.perf_counter）. 先睡眠，最后 spin 秒忙等. """
+    remain = deadline - time.perf_counter()
+    if remain > spin:
+        time.sleep(remain - spin)
+    while time.perf_counter() < deadline:
+        pass
@@ -0,0 +1,95 @@
+import itertools
+from typing import List
+
+import numpy as np
+
+
+class UniformGrid(object):
+    """ 均匀网格空间索引.
+
+    将点集按照边长为 cell_size 的网格分桶，查询时只检查与查询球相交的网格.
+    """
+
+    def __init__(self, cell_size: float):
+        if cell_size <= 0.:
+            raise ValueError("cell_size must be positive.")
+        self.cell_size = float(cell_size)
+        self._points = np.zeros((0, 2))
+        self._cells = {}  # Dict[Tuple[int, ...], np.ndarray]
+
+    def build(self, points):
+        """ 重建索引.
+
+        :param points: 点集 (N, dim).
+        """
+        self._cells = {}
+        if not len(points):
+            self._points = np.zeros((0, 2))
+            return
+        self._points = np.asarray(points, dtype=float).reshape(len(points), -1)
+        keys = np.floor(self._points / self.cell_size).astype(np.int64)
+        order = np.lexsort(keys.T[::-1])
+        keys = keys[order]
+        bounds = np.flatnonzero((keys[1:] != keys[:-1]).any(axis=1)) + 1
+        starts = np.concatenate(([0], bounds))
+        ends = np.concatenate((bounds, [len(keys)]))
+        for start, end in zip(starts, ends):
+            self._cells[tuple(keys[start].tolist())] = order[start:end]
+
+    def query(self, center, radius: float) -> np.ndarray:
+        """ 查询距离 center 不超过 radius 的点.
+
+        :return: 点的序号（升序）.
+        """
+        center = np.asarray(center, dtype=float)
+        lo = np.floor((center - radius) / self.cell_size).astype(np.int64)
+        hi = np.floor((center + radius) / self.cell_size).astype(np.int64)
+        found = []
+        for key in itertools.product(*[range(a, b + 1) for a, b in zip(lo, hi)]):
+            index = self._cells.get(key)
+            if index is not None:
+                found.append(index)
+        if not found:
+            return np.zeros(0, dtype=np.int64)
+        index = np.concatenate(found)
+        delta = self._points[index] - center
+        index = index[(delta * delta).sum(axis=1) <= radius * radius]
+        return np.sort(index)
+
+
+class NeighborIndex(object):
+    """ 实体近邻索引.
+
+    按实体的 position_prop 属性建立均匀网格索引. 没有位置属性的实体
+    无法排除，总是作为候选返回.
+    """
+
+    def __init__(self, entities: List, cell_size: float):
+        self._entities = entities
+        self._free = []  # List[Entity]，无位置属性的实体.
+        self._indexed = []  # List[Entity]
+        points = []
+        for obj in entities:
+            pos = getattr(obj, obj.position_prop, None)
+            if pos is None:
+                self._free.append(obj)
+            else:
+                self._indexed.append(obj)
+                points.append(pos)
+        self._grid = UniformGrid(cell_size)
+        self._grid.build(points)
+
+    def query(self, obj, radius: float) -> List:
+        """ 查询 obj 周围 radius 范围内的其他实体.
+
+        :param obj: 查询中心实体. 没有位置属性时，返回全部其他实体.
+        :param radius: 查询半径.
+        """
+        pos = getattr(obj, obj.position_prop, None)
+        if pos is None:
+            return [other for other in self._entities if other.id != obj.id]
+        indexed = self._indexed
+        others = [indexed[i] for i in self._grid.query(pos, radius)
+                  if indexed[i].id != obj.id]
+        others.extend(other for other in self._free if other.id != obj.id)
+        return others
@@ -19,38 +19,50 @@ def is_close(v0, v1, atol=1e-8) -> bool:
     return numpy.allclose(array(v0), array(v1), atol=atol)
 
 
-def dist(v1, v0=None) -> float:
-    """ 计算向量长度. """
-    a = array(v1)
-    return numpy.linalg.norm(a) if v0 is None else numpy.linalg.norm(a - array(v0))
+def dist(v1, v0=None):
+    """ 计算向量长度.
+
+    支持批量计算：输入为 (N, dim) 时返回 (N,)，v0 与 v1 按广播规则相减.
+    """
+    a = array(v1) if v0 is None else array(v1) - array(v0)
+    if a.ndim > 1:
+        return numpy.linalg.norm(a, axis=-1)
+    return numpy.linalg.norm(a)
 
 
 def unit(v) -> numpy.ndarray:
     """ 计算单位向量.
+
+    支持批量计算：输入为 (N, dim) 时逐行计算. 零向量的结果为零向量.
     """
     a = array(v)
+    if a.ndim > 1:
+        d = numpy.expand_dims(dist(a), -1)
+        return numpy.divide(a, d, out=numpy.zeros(a.shape, float), where=d > 0.)
     d = dist(a)
-    return a / d if d > 0. else numpy.zeros(a.shape, numpy.float)
+    return a / d if d > 0. else numpy.zeros(a.shape, float)
 
 
 def array(v) -> numpy.ndarray:
     """ 向量化. """
-    return v if isinstance(v, numpy.ndarray) else numpy.array(v, numpy.float)
+    return v if isinstance(v, numpy.ndarray) else numpy.array(v, float)
 
 
 def proj(v1, v0) -> numpy.ndarray:
     """ 向量投影.
 
-    将向量 v1 投影至 v0.
+    将向量 v1 投影至 v0. 支持批量计算，v1 与 v0 按广播规则逐行投影.
     """
-    a = v1 if isinstance(v1, numpy.ndarray) else numpy.array(v1, numpy.float)
+    a = array(v1)
     b = unit(v0)
-    return b * numpy.dot(a, b)
+    return b * numpy.sum(a * b, axis=-1, keepdims=True)
 
 
-def angle(v0, v1, fmt='d') -> float:
+def angle(v0, v1, fmt='d'):
     """ 计算向量夹角.
 
+    支持批量计算：输入为 (N, dim) 时返回 (N,). 含零向量时夹角为 0.
+
     :param v0: 向量1.
     :param v1: 向量2.
     :param fmt: 返回值格式. 默认是度数.
@@ -58,10 +70,12 @@ def angle(v0, v1, fmt='d') -> float:
             'r', 'radian' : 弧度.
     """
     v0_, v1_ = array(v0), array(v1)
+    if v0_.ndim > 1 or v1_.ndim > 1:
+        return _angles(v0_, v1_, fmt)
     d0, d1 = dist(v0_), dist(v1_)
     if d0 > 0. and d1 > 0.:
         v = numpy.dot(v1_, v0_) / d0 / d1
-        a = math.acos(v)
+        a = math.acos(min(max(v, -1.), 1.))
         if fmt in ('d', 'degree'):
             return math.degrees(a)
         elif fmt in ('r', 'radian'):
@@ -72,9 +86,23 @@ def angle(v0, v1, fmt='d') -> float:
         return float(0)
 
 
+def _angles(v0, v1, fmt):
+    """ 批量计算向量夹角. """
+    if fmt not in ('d', 'degree', 'r', 'radian'):
+        raise Exception("fmt parameter: invalid value.")
+    d = dist(v0) * dist(v1)
+    v = numpy.sum(v1 * v0, axis=-1) / numpy.where(d > 0., d, 1.)
+    a = numpy.where(d > 0., numpy.arccos(numpy.clip(v, -1., 1.)), 0.)
+    if fmt in ('d', 'degree'):
+        a = numpy.degrees(a)
+    return a
+
+
 def aer_to_xyz(aer, center=None, fmt='d') -> numpy.ndarray:
     """ AER坐标 转换至 XYZ坐标.
 
+    支持批量计算：aer 为 (N, 3) 时返回 (N, 3)，center 按广播规则相加.
+
     :param aer: aer 坐标.
     :param center: 极坐标中心点坐标.
     :param fmt: 角度格式. 默认是度数.
@@ -82,6 +110,8 @@ def aer_to_xyz(aer, center=None, fmt='d') -> numpy.ndarray:
             'r', 'radian' : 弧度.
     :return: xyz 坐标.
     """
+    if numpy.ndim(aer) > 1:
+        return _aer_to_xyz(array(aer), center, fmt)
     if fmt in ('r', 'radian'):
         a, e, r = aer[0], aer[1], aer[2]
     elif fmt in ('d', 'degree'):
@@ -92,7 +122,24 @@ def aer_to_xyz(aer, center=None, fmt='d') -> numpy.ndarray:
     r2 = r * math.cos(e)
     x, y = r2 * math.sin(a), r2 * math.cos(a)
 
-    ret = numpy.array([x, y, z], dtype=numpy.float)
+    ret = numpy.array([x, y, z], dtype=float)
+    if center is not None:
+        ret = ret + array(center)
+    return ret
+
+
+def _aer_to_xyz(aer, center, fmt) -> numpy.ndarray:
+    """ 批量转换 AER坐标 至 XYZ坐标. """
+    a, e, r = aer[..., 0], aer[..., 1], aer[..., 2]
+    if fmt in ('d', 'degree'):
+        a, e = numpy.radians(a), numpy.radians(e)
+    elif fmt not in ('r', 'radian'):
+        raise Exception("fmt parameter: invalid value.")
+    z = r * numpy.sin(e)
+    r2 = r * numpy.cos(e)
+    x, y = r2 * numpy.sin(a), r2 * numpy.cos(a)
+
+    ret = numpy.stack([x, y, z], axis=-1).astype(float)
     if center is not None:
         ret = ret + array(center)
     return ret
@@ -101,6 +148,8 @@ def aer_to_xyz(aer, center=None, fmt='d') -> numpy.ndarray:
 def xyz_to_aer(xyz, center, fmt='d') -> numpy.ndarray:
     """ XYZ坐标 转换至 AER坐标.
 
+    支持批量计算：xyz 为 (N, 3) 时返回 (N, 3)，center 按广播规则相减.
+
     :param xyz: xyz 坐标.
     :param center: 中心点坐标.
     :param fmt: 角度格式. 默认是度数.
@@ -108,6 +157,8 @@ def xyz_to_aer(xyz, center, fmt='d') -> numpy.ndarray:
             'r', 'radian' : 弧度.
     :return: aer 坐标.
     """
+    if numpy.ndim(xyz) > 1:
+        return _xyz_to_aer(array(xyz), center, fmt)
     xyz2 = xyz if center is None else (xyz - center)
     r = dist(xyz2)
     if r > 0.:
@@ -117,6 +168,19 @@ def xyz_to_aer(xyz, center, fmt='d') -> numpy.ndarray:
         if fmt in ('d', 'degree'):
             a = math.degrees(a) % 360
             e = math.degrees(e)
-        return numpy.array([a, e, r], dtype=numpy.float)
+        return numpy.array([a, e, r], dtype=float)
     else:
-        return numpy.array([0, 0, 0], dtype=numpy.float)
+        return numpy.array([0, 0, 0], dtype=float)
+
+
+def _xyz_to_aer(xyz, center, fmt) -> numpy.ndarray:
+    """ 批量转换 XYZ坐标 至 AER坐标. """
+    xyz2 = xyz if center is None else xyz - array(center)
+    r = dist(xyz2)
+    a = numpy.arctan2(xyz2[..., 0], xyz2[..., 1])
+    e = numpy.arctan2(xyz2[..., 2], dist(xyz2[..., 0:2]))
+    if fmt in ('d', 'degree'):
+        a = numpy.degrees(a) % 360
+        e = numpy.degrees(e)
+    ret = numpy.stack([a, e, r], axis=-1).astype(float)
+    return numpy.where(numpy.expand_dims(r, -1) > 0., ret, 0.)
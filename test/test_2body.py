@@ -73,8 +73,8 @@ class BodyTest(unittest.TestCase):
         env.step_events.append(recorder)
 
         sat = env.add(Body('sat'))
-        sat.pos = np.array([0, 6000e3], dtype=np.float)
-        sat.vel = np.array([10e3, 0], dtype=np.float)
+        sat.pos = np.array([0, 6000e3], dtype=float)
+        sat.vel = np.array([10e3, 0], dtype=float)
         sat.access_handlers.append(gravaity_rule)
 
         earth = env.add(Body('earth'))
@@ -92,12 +92,16 @@ class BodyTest(unittest.TestCase):
         env.step_events.append(recorder)
 
         rabbit = env.add(Body('rabbit'))
-        rabbit.vel = np.array([1, 0], dtype=np.float)
+        rabbit.vel = np.array([1, 0], dtype=float)
 
         dog = env.add(Body('dog'))
-        dog.pos = np.array([0, 20], dtype=np.float)
+        dog.pos = np.array([0, 20], dtype=float)
         dog.access_handlers.append(chase_rule)
 
+        # 狗只关注兔子.
+        rabbit.group, dog.group = 'rabbit', 'dog'
+        env.set_interaction('dog', ['rabbit'])
+
         env.run(step=0.1, duration=30)
         self.assertTrue(len(recorder.records) > 0)
         recorder.plot()
@@ -0,0 +1,83 @@
+import asyncio
+import time
+import unittest
+
+from simu import Environment
+from simu.common import MoveEntity
+
+
+class AsyncRunTest(unittest.TestCase):
+    def test_arun(self):
+        """ 测试协程运行与步进事件. """
+        env = Environment()
+        bird = env.add(MoveEntity('bird', speed=1, waypoints=[[0, 0], [10, 0]]))
+        times = []
+
+        async def record(env):
+            await asyncio.sleep(0)
+            times.append(env.time_info[0])
+
+        env.step_events.append(record)
+        env.step_events.append(lambda env: times.append(-1.))
+        asyncio.run(env.arun(duration=1))
+        self.assertEqual(len(times), 20)
+        self.assertAlmostEqual(times[-2], 0.9)
+        self.assertAlmostEqual(bird.position[0], 0.9)
+
+    def test_arun_socket(self):
+        """ 测试实时仿真与本地套接字在同一事件循环中运行. """
+        env = Environment()
+        bird = env.add(MoveEntity('bird', speed=1, waypoints=[[0, 0], [100, 0]]))
+        received = []
+
+        async def main():
+            clients = []
+
+            async def handle(reader, writer):
+                clients.append(writer)
+                # 接收外部命令.
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    bird.speed = float(line)
+                clients.remove(writer)
+                writer.close()
+                await writer.wait_closed()
+                handled.set()
+
+            async def telemetry(env):
+                for writer in clients:
+                    writer.write(b'%.3f %.3f\n' % (env.time_info[0], bird.position[0]))
+                    await writer.drain()
+
+            handled = asyncio.Event()
+            server = await asyncio.start_server(handle, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            env.step_events.append(telemetry)
+
+            async def client():
+                while len(received) < 5:
+                    received.append(await reader.readline())
+                writer.write(b'10\n')
+                await writer.drain()
+
+            t = time.perf_counter()
+            await asyncio.gather(env.arun(realtime=True, duration=0.5, step=0.05),
+                                 client())
+            elapsed = time.perf_counter() - t
+            # 关闭连接，等待服务端读到 EOF 后退出.
+            writer.close()
+            await writer.wait_closed()
+            await handled.wait()
+            server.close()
+            await server.wait_closed()
+            return elapsed
+
+        elapsed = asyncio.run(main())
+        self.assertTrue(0.45 <= elapsed < 2.)
+        self.assertEqual(len(received), 5)
+        self.assertEqual(bird.speed, 10.)
+        self.assertGreater(bird.position[0], 1.)
+        self.assertEqual(env.clock.ticks, 10)
@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from simu import Environment, Entity
+from simu.cache import RunCache
+
+
+class Cart(Entity):
+    def __init__(self, switch, late_speed):
+        super().__init__('cart')
+        self.protect_props.append('x')
+        self.x = np.zeros(1)
+        self.switch = switch
+        self.late_speed = late_speed
+        self.steps = 0
+
+    def step(self, time_info):
+        t, dt = time_info
+        self.x += dt * (1. if t < self.switch else self.late_speed)
+        self.steps += 1
+
+
+def build(switch=5., late_speed=1.):
+    env = Environment()
+    env.add(Cart(switch, late_speed))
+    return env
+
+
+class RunCacheTest(unittest.TestCase):
+    def test_resume(self):
+        """ 测试参数在后期生效时从检查点继续运行. """
+        with tempfile.TemporaryDirectory() as path:
+            cache = RunCache(path, interval=10)
+            kwargs = dict(step=0.1, duration=10)
+            effective = {'late_speed': 5.}
+
+            env = cache.run(build, dict(late_speed=1.), effective, **kwargs)
+            self.assertEqual(cache.resumed_ticks, 0)
+            self.assertEqual(env.find('cart').steps, 100)
+
+            env = cache.run(build, dict(late_speed=2.), effective, **kwargs)
+            self.assertEqual(cache.resumed_ticks, 50)
+            self.assertEqual(env.find('cart').steps, 50)
+            expected = build(late_speed=2.)
+            expected.run(**kwargs)
+            np.testing.assert_almost_equal(env.find('cart').x, expected.find('cart').x)
+
+            # 相同参数直接命中结束时刻的检查点.
+            env = cache.run(build, dict(late_speed=2.), effective, **kwargs)
+            self.assertEqual(cache.resumed_ticks, 100)
+            np.testing.assert_almost_equal(env.find('cart').x, expected.find('cart').x)
+
+            # 参数从起始生效时不能复用.
+            cache.run(build, dict(switch=4.), effective, **kwargs)
+            self.assertEqual(cache.resumed_ticks, 0)
+
+    def test_evict(self):
+        """ 测试按大小淘汰. """
+        with tempfile.TemporaryDirectory() as path:
+            cache = RunCache(path, interval=10)
+            cache.run(build, step=0.1, duration=10)
+            files = os.listdir(path)
+            self.assertEqual(len(files), 10)
+            size = os.path.getsize(os.path.join(path, files[0]))
+
+            cache.max_bytes = 3 * size
+            cache.evict()
+            self.assertEqual(len(os.listdir(path)), 3)
+            cache.run(build, step=0.1, duration=10)
+            self.assertGreater(cache.resumed_ticks, 0)
+            self.assertLessEqual(len(os.listdir(path)), 3)
+            cache.clear()
+            self.assertEqual(os.listdir(path), [])
+
+    def test_corrupt(self):
+        """ 测试不完整的检查点按未命中处理. """
+        with tempfile.TemporaryDirectory() as path:
+            cache = RunCache(path, interval=10)
+            expected = cache.run(build, step=0.1, duration=10).find('cart').x
+            self.assertFalse([name for name in os.listdir(path) if not name.endswith('.npz')])
+            for name in os.listdir(path):
+                filename = os.path.join(path, name)
+                with open(filename, 'r+b') as file:
+                    file.truncate(os.path.getsize(filename) // 2)
+
+            env = cache.run(build, step=0.1, duration=10)
+            self.assertEqual(cache.resumed_ticks, 0)
+            self.assertEqual(env.find('cart').steps, 100)
+            np.testing.assert_almost_equal(env.find('cart').x, expected)
+            # 损坏的检查点已被重新保存.
+            cache.run(build, step=0.1, duration=10)
+            self.assertEqual(cache.resumed_ticks, 100)
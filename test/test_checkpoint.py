@@ -0,0 +1,147 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from simu import Environment, Entity
+from simu.checkpoint import save_checkpoint, load_checkpoint
+from simu.common import MoveEntity, MoveEntityArray
+
+
+class Counter(Entity):
+    def __init__(self, name=''):
+        super().__init__(name)
+        self.protect_props.extend(['value', 'count', 'tags'])
+        self.value = np.zeros(3)
+        self.count = 0
+        self.tags = []
+
+    def step(self, time_info):
+        self.value += time_info[1]
+        self.count += 1
+        self.tags.append(self.count)
+
+
+def build():
+    env = Environment()
+    env.add(MoveEntity('a', speed=2, waypoints=[[0, 0], [10, 0], [10, 10]]))
+    group = env.add(MoveEntityArray('g'))
+    group.add('m0', speed=1, waypoints=[[0, 0], [0, 5], [5, 5]])
+    group.add('m1', speed=3, waypoints=[[1, 1], [9, 1]])
+    env.add(Counter('c'))
+    idle = env.add(Counter('idle'))
+    idle.set_active(False)
+    return env
+
+
+def state(env):
+    return [(obj.name, np.copy(getattr(obj, 'position', getattr(obj, 'value', 0.))))
+            for obj in env.entities]
+
+
+class CheckpointTest(unittest.TestCase):
+    def test_resume(self):
+        """ 测试从检查点恢复后继续运行与连续运行一致. """
+        env = build()
+        env.reset(step=0.1, duration=8)
+        for _ in range(30):
+            env.step()
+        with tempfile.TemporaryDirectory() as path:
+            filename = os.path.join(path, 'cp.npz')
+            save_checkpoint(env, filename)
+            while not env.is_over():
+                env.step()
+
+            other = build()
+            other.find('idle').set_active(True)
+            load_checkpoint(other, filename)
+            self.assertFalse(other.find('idle').is_active())
+            self.assertAlmostEqual(other.time_info[0], 3.)
+            while not other.is_over():
+                other.step()
+
+            self.assertEqual(other.clock.ticks, env.clock.ticks)
+            for (name1, v1), (name2, v2) in zip(state(env), state(other)):
+                self.assertEqual(name1, name2)
+                np.testing.assert_almost_equal(v1, v2)
+            self.assertEqual(other.find('c').count, env.find('c').count)
+            self.assertEqual(other.find('c').tags, env.find('c').tags)
+            self.assertEqual(other.find('a').track.is_over(), env.find('a').track.is_over())
+            # 成员位置仍是群组数组的视图.
+            self.assertIs(other.find('m1').position.base, other.find('g')._positions)
+
+            self.assertRaises(ValueError, load_checkpoint, Environment(), filename)
+
+    def test_values(self):
+        """ 测试非数值状态的保存与恢复. """
+        env = build()
+        env.reset()
+        env.step()
+        counter = env.find('c')
+        counter.tags = [None, 'x', (1, 2.5), {'k': np.arange(3), 2: [True]}]
+        with tempfile.TemporaryDirectory() as path:
+            filename = os.path.join(path, 'cp.npz')
+            save_checkpoint(env, filename)
+            other = build()
+            load_checkpoint(other, filename)
+            tags = other.find('c').tags
+            self.assertEqual(tags[:3], [None, 'x', (1, 2.5)])
+            np.testing.assert_equal(tags[3]['k'], np.arange(3))
+            self.assertEqual(tags[3][2], [True])
+
+            # 不支持保存任意对象.
+            counter.tags = [object()]
+            self.assertRaises(TypeError, save_checkpoint, env, filename)
+
+    def test_scheduled_events(self):
+        """ 测试恢复后调度事件按原时刻继续. """
+        def build_events(calls):
+            env = build()
+            env.add_step_event(lambda env: calls.append(('every', env.clock.ticks)), every=10)
+            env.add_step_event(lambda env: calls.append(('interval', env.clock.ticks)),
+                               interval=0.25)
+            env.add_step_event(lambda c: calls.append(('when', c.env.clock.ticks)),
+                               env.find('c'), when=lambda c: c.count >= 3)
+            return env
+
+        calls = []
+        env = build_events(calls)
+        env.reset(step=0.1, duration=5)
+        for _ in range(15):
+            env.step()
+        with tempfile.TemporaryDirectory() as path:
+            filename = os.path.join(path, 'cp.npz')
+            save_checkpoint(env, filename)
+            del calls[:]
+            while not env.is_over():
+                env.step()
+
+            resumed = []
+            other = build_events(resumed)
+            load_checkpoint(other, filename)
+            while not other.is_over():
+                other.step()
+        self.assertEqual(resumed, calls)
+        self.assertEqual([tick for name, tick in calls if name == 'every'], [20, 30, 40])
+        self.assertNotIn('when', [name for name, _ in calls])
+
+    def test_array_waypoints(self):
+        """ 测试恢复数组航路点的运动实体时不修改航路点. """
+        waypoints = np.array([[0., 0.], [10., 0.]])
+        env = Environment()
+        env.add(MoveEntity('a', speed=1, waypoints=waypoints.copy()))
+        env.reset(step=0.1)
+        for _ in range(20):
+            env.step()
+        with tempfile.TemporaryDirectory() as path:
+            filename = os.path.join(path, 'cp.npz')
+            save_checkpoint(env, filename)
+
+            points = waypoints.copy()
+            other = Environment()
+            obj = other.add(MoveEntity('a', speed=1, waypoints=points))
+            load_checkpoint(other, filename)
+            np.testing.assert_almost_equal(obj.position, env.find('a').position)
+            np.testing.assert_equal(points, waypoints)
+            other.reset()
+            np.testing.assert_equal(obj.position, [0., 0.])
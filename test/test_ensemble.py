@@ -0,0 +1,37 @@
+import unittest
+
+import numpy as np
+from simu import Environment
+from simu.common import MoveEntity
+from simu.ensemble import Ensemble
+
+
+def make_scenario(rng, speed=1.):
+    env = Environment()
+    end = rng.random(2) * 10
+    env.add(MoveEntity('bird', speed=speed * (1 + 0.1 * np.random.random()),
+                       waypoints=[[0, 0], end]))
+    return env
+
+
+def final_position(env):
+    return env.find('bird').position.copy()
+
+
+class EnsembleTest(unittest.TestCase):
+    def test_ensemble(self):
+        """ 测试集合仿真结果可复现，且与进程数无关. """
+        params = [{'speed': s} for s in (0.5, 1., 2., 4., 8.)]
+        results = []
+        for processes in (1, 2, 3):
+            ensemble = Ensemble(make_scenario, final_position,
+                                processes=processes, seed=7, duration=2)
+            results.append(ensemble.run(params))
+        for ret in results[1:]:
+            np.testing.assert_array_equal(ret, results[0])
+        self.assertFalse(np.allclose(results[0][0], results[0][1]))
+
+        ensemble = Ensemble(make_scenario, final_position, processes=1,
+                            seed=7, duration=2)
+        mean = ensemble.run(params, reducer=lambda r: np.mean(r, axis=0))
+        np.testing.assert_array_almost_equal(mean, np.mean(results[0], axis=0))
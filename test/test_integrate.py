@@ -0,0 +1,74 @@
+import unittest
+
+import numpy as np
+from simu import Environment, Entity
+from simu.integrate import Integrator, Verlet, RK4, DormandPrince
+from simu.kernel import GravityKernel
+
+G, M, R = 6.67e-11, 5.965e24, 7000e3
+
+
+class Body(Entity):
+    def __init__(self, name=''):
+        super().__init__(name)
+        self.protect_props.extend(['pos', 'vel'])
+        self.pos = np.zeros(2)
+        self.vel = np.zeros(2)
+        self.acc = np.zeros(2)
+        self.m = 1.
+
+
+def orbit(integrator, n):
+    """ 卫星绕地球运行一周（n 步），返回终点与起点的距离. """
+    env = Environment()
+    env.integrator = integrator
+    env.access_kernels.append(GravityKernel(G=G, out_prop='acc'))
+    earth = env.add(Body('earth'))
+    earth.m = M
+    sat = env.add(Body('sat'))
+    sat.pos = np.array([0., R])
+    sat.vel = np.array([(G * M / R) ** 0.5, 0.])
+    period = 2 * np.pi * (R ** 3 / (G * M)) ** 0.5
+    env.run(step=period / n, duration=period / n * (n + 1))
+    return np.linalg.norm(sat.pos - [0., R])
+
+
+class IntegrateTest(unittest.TestCase):
+    def test_orbit(self):
+        """ 测试高阶积分器以大步长保持精度. """
+        euler = orbit(Integrator(), 100)
+        verlet = orbit(Verlet(), 100)
+        rk4 = orbit(RK4(), 100)
+        dopri = orbit(DormandPrince(rtol=1e-8), 10)
+        self.assertGreater(euler, 10e3)
+        self.assertLess(verlet, euler)
+        self.assertLess(rk4, 100.)
+        self.assertLess(dopri, 100.)
+
+    def test_evaluate_access(self):
+        """ 测试步进之外不能重新互操作. """
+        env = Environment()
+        with self.assertRaises(RuntimeError):
+            env.evaluate_access([])
+
+    def test_substep_per_dt(self):
+        """ 测试自适应子步长按步进时间分别保存. """
+        integrator = DormandPrince(rtol=1e-8)
+        env = Environment()
+        env.integrator = integrator
+        env.access_kernels.append(GravityKernel(G=G, out_prop='acc'))
+        earth = env.add(Body('earth'))
+        earth.m = M
+        sats = []
+        for period in (1, 2):
+            sat = env.add(Body())
+            sat.pos = np.array([0., R])
+            sat.vel = np.array([(G * M / R) ** 0.5, 0.])
+            sat.update_period = period
+            sats.append(sat)
+        orbit_period = 2 * np.pi * (R ** 3 / (G * M)) ** 0.5
+        step = orbit_period / 20
+        env.run(step=step, duration=step * 21)
+        self.assertEqual(sorted(dt for dt in integrator._h if dt > 0), [step, 2 * step])
+        for sat in sats:
+            self.assertLess(np.linalg.norm(sat.pos - [0., R]), 100.)
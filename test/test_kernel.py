@@ -0,0 +1,43 @@
+import unittest
+
+import numpy as np
+from simu import Environment, Entity
+from simu import vec
+from simu.kernel import GravityKernel
+
+
+class Body(Entity):
+    def __init__(self, name=''):
+        super().__init__(name)
+        self.protect_props.append('pos')
+        self.pos = np.zeros(2)
+        self.m = 1.
+        self._f = np.zeros(2)
+
+
+def gravity_rule(obj, other):
+    v = vec.unit(other.pos - obj.pos)
+    obj._f += 6.67e-11 * other.m / (vec.dist(obj.pos, other.pos) ** 2) * v
+
+
+class KernelTest(unittest.TestCase):
+    def test_gravity_kernel(self):
+        """ 测试引力核与逐对互操作结果一致. """
+        positions = np.random.random((20, 2)) * 1e3
+        masses = np.random.random(20) * 1e10
+        results = []
+        for use_kernel in (False, True):
+            env = Environment()
+            for pos, m in zip(positions, masses):
+                body = env.add(Body())
+                body.pos, body.m = pos.copy(), m
+                if not use_kernel:
+                    body.access_handlers.append(gravity_rule)
+            if use_kernel:
+                env.access_kernels.append(GravityKernel(block_size=7))
+                env.add(Entity())  # 不参与计算的实体.
+            env.reset()
+            env.step()
+            results.append(np.array([obj._f for obj in env.entities
+                                     if isinstance(obj, Body)]))
+        np.testing.assert_allclose(results[1], results[0], rtol=1e-9)
@@ -5,8 +5,8 @@
 import unittest
 import numpy as np
 import matplotlib.pyplot as plt
-from simu import Environment
-from simu.common import MoveEntity
+from simu import Environment, Entity
+from simu.common import MoveEntity, MoveEntityArray
 from simu import vec
 
 
@@ -57,3 +57,115 @@ class MoveTest(unittest.TestCase):
 
         np.testing.assert_almost_equal(bird.position, bird.track.end)
         self.assertTrue(True)
+
+    def test_move_entity_array(self):
+        """ 测试 MoveEntityArray 与 MoveEntity 运动一致. """
+        routes = [
+            dict(speed=5, waypoints=[[1, 1], [10, 10]]),
+            dict(speed=3, waypoints=[[0, 0], [1, 0], [1, 1], [5, 1]]),
+            dict(speed=0.5, waypoints=[[2, 2]]),
+            dict(speed=20, waypoints=[[0, 0], [0, 1], [1, 1], [1, 0]]),
+        ]
+        env1, env2 = Environment(), Environment()
+        singles = [env1.add(MoveEntity(**kw)) for kw in routes]
+        group = env2.add(MoveEntityArray())
+        members = [group.add('m%d' % i, **kw) for i, kw in enumerate(routes)]
+        counter = []
+        members[0].step_events.append(lambda obj: counter.append(obj.id))
+
+        self.assertIs(env2.find('m1'), members[1])
+        env1.reset()
+        env2.reset()
+        while not env1.is_over():
+            env1.step()
+            env2.step()
+            for obj, member in zip(singles, members):
+                np.testing.assert_almost_equal(member.position, obj.position)
+                np.testing.assert_almost_equal(member.velocity, obj.velocity)
+        self.assertEqual(len(counter), 100)
+        for obj, member in zip(singles, members):
+            self.assertEqual(member.track.is_over(), obj.track.is_over())
+
+        env2.remove(group)
+        self.assertEqual(len(env2.entities), 0)
+
+    def test_move_entity_array_members(self):
+        """ 测试群组成员的镜像、活动状态和删除. """
+        env = Environment()
+        group = env.add(MoveEntityArray())
+        members = [group.add('m%d' % i, speed=1, waypoints=[[0, i], [100, i]])
+                   for i in range(3)]
+        seen = []
+        watcher = env.add(Entity())
+        watcher.access_handlers.append(
+            lambda obj, other: seen.append((other.name, other.position[0]))
+            if other.name == 'm1' else None)
+        env.reset(step=0.5, duration=10)
+        env.step()
+        env.step()
+        # 互操作读取步进前的位置.
+        self.assertEqual(seen, [('m1', 0.), ('m1', 0.)])
+        self.assertEqual(members[1].position[0], 0.5)
+        self.assertIsInstance(members[1].mirror, type(members[1]))
+        self.assertEqual(members[1].mirror.name, 'm1')
+
+        # 不活动的成员停止移动.
+        members[0].set_active(False)
+        env.step()
+        self.assertEqual(members[0].position[0], 0.5)
+        self.assertEqual(members[1].position[0], 1.)
+
+        # 移出环境的成员从群组中删除，最后一个成员移至其所在的行.
+        env.remove(members[1])
+        self.assertEqual(group.members, [members[0], members[2]])
+        self.assertIsNone(env.find('m1'))
+        env.step()
+        self.assertEqual(members[1].position[0], 1.)
+        self.assertEqual(members[2].position[0], 1.5)
+        self.assertEqual(members[2].position[1], 2.)
+
+    def test_track_position_at(self):
+        """ 测试航线按航程定位和 MoveEntity 跳转. """
+        rng = np.random.default_rng(0)
+        waypoints = np.cumsum(rng.random((200, 2)), axis=0)
+        env = Environment()
+        bird = env.add(MoveEntity(speed=3, waypoints=waypoints))
+        self.assertAlmostEqual(bird.track.length,
+                               np.linalg.norm(np.diff(waypoints, axis=0), axis=1).sum())
+
+        env.reset(step=0.1, duration=20)
+        while not env.is_over():
+            t = env.time_info[0]  # 步进时刻，步进后实体处于该时刻的状态.
+            env.step()
+        np.testing.assert_almost_equal(bird.position_at(t), bird.position)
+        np.testing.assert_almost_equal(bird.position_at([0., t])[0], waypoints[0])
+
+        other = MoveEntity(speed=3, waypoints=waypoints)
+        other.seek(t)
+        np.testing.assert_almost_equal(other.position, bird.position)
+        self.assertAlmostEqual(other.track.traveled, bird.track.traveled)
+        self.assertAlmostEqual(np.linalg.norm(other.velocity), 3.)
+
+        other.seek(1e6)
+        np.testing.assert_almost_equal(other.position, waypoints[-1])
+        self.assertTrue(other.track.is_over())
+
+    def test_track_set_position(self):
+        """ 测试外部修改位置后自该位置继续运动. """
+        env = Environment()
+        bird = env.add(MoveEntity(speed=1, waypoints=[[0, 0], [10, 0], [10, 10]]))
+        env.reset(step=0.1)
+        env.step()
+        bird.position = vec.array([5, 0])
+        env.step()
+        np.testing.assert_almost_equal(bird.position, [5.1, 0])
+        env.step()
+        np.testing.assert_almost_equal(bird.position, [5.2, 0])
+
+        # 离开航线时朝向目标航路点直线前进.
+        bird.position = vec.array([10, -5])
+        env.step()
+        np.testing.assert_almost_equal(bird.position, [10, -4.9])
+        for _ in range(100):
+            env.step()
+        np.testing.assert_almost_equal(bird.position, [10, 5.1])
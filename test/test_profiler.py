@@ -0,0 +1,47 @@
+import unittest
+
+from simu import CompactEntity, Environment, Entity
+from simu.common import MoveEntity
+from simu.profiler import StepProfiler
+
+
+def noop_rule(obj, other):
+    pass
+
+
+def noop_step(obj, time_info):
+    pass
+
+
+class Decoy(CompactEntity):
+    __slots__ = ()
+    default_step_handlers = (noop_step,)
+
+
+class ProfilerTest(unittest.TestCase):
+    def test_profiler(self):
+        """ 测试按阶段、处理函数统计. """
+        env = Environment()
+        env.profiler = StepProfiler()
+        bird = env.add(MoveEntity('bird', speed=1, waypoints=[[0, 0], [10, 0]]))
+        bird.access_handlers.append(noop_rule)
+        env.add(Entity())
+        decoy = env.add(Decoy())
+        env.step_events.append(lambda e: None)
+        env.run(duration=1)
+
+        records = env.profiler.records
+        for name in ('snapshot', 'access', 'kernel', 'step', 'on_step',
+                     'step_events', 'clock'):
+            self.assertEqual(records[('phase', name, '')][0], 10)
+        self.assertEqual(records[('step', 'MoveEntity', 'MoveEntity.move')][0], 10)
+        self.assertEqual(records[('access', 'MoveEntity', 'noop_rule')][0], 20)  # 每步两个对象.
+        # 紧凑实体按处理函数统计，且不为实例复制处理函数列表.
+        self.assertEqual(records[('step', 'Decoy', 'noop_step')][0], 10)
+        self.assertIsNone(decoy._step_handlers)
+        self.assertEqual(env.profiler.summary()[0][0][0], 'phase')
+        self.assertIn('noop_rule', env.profiler.report())
+
+        env.profiler = None
+        env.run(duration=1)
+        self.assertEqual(records[('phase', 'step', '')][0], 10)
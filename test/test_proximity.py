@@ -0,0 +1,100 @@
+import unittest
+
+import numpy as np
+from simu import Environment, Entity
+from simu.common import MoveEntity
+from simu.proximity import ProximityTrigger
+
+
+class ProximityTest(unittest.TestCase):
+    def test_crossing_time(self):
+        """ 测试穿越时刻插值和步长内掠过. """
+        env = Environment()
+        post = env.add(Entity('post'))
+        post.position = np.array([5., 1.])
+        slow = env.add(MoveEntity('slow', speed=1, waypoints=[[0, 0], [10, 0]]))
+        fast = env.add(MoveEntity('fast', speed=200, waypoints=[[-100, 1.5], [100, 1.5]]))
+        events = []
+        trigger = ProximityTrigger(
+            2., on_enter=lambda a, b, t: events.append(('enter', a.name, b.name, t)),
+            on_exit=lambda a, b, t: events.append(('exit', a.name, b.name, t)))
+        env.step_events.append(trigger)
+        env.run(step=0.1, duration=10)
+
+        # slow 与 post 在 x = 5 -+ sqrt(3) 时相距 2.
+        slow_events = [e for e in events if 'slow' in e[1:3] and 'post' in e[1:3]]
+        self.assertEqual([e[0] for e in slow_events], ['enter', 'exit'])
+        self.assertAlmostEqual(slow_events[0][3], 5. - np.sqrt(3.))
+        self.assertAlmostEqual(slow_events[1][3], 5. + np.sqrt(3.))
+
+        # fast 每步移动 20，在一步内掠过 post.
+        fast_events = [e for e in events if 'fast' in e[1:3] and 'post' in e[1:3]]
+        self.assertEqual([e[0] for e in fast_events], ['enter', 'exit'])
+        dx = np.sqrt(4. - 0.25)
+        self.assertAlmostEqual(fast_events[0][3], (105. - dx) / 200.)
+        self.assertAlmostEqual(fast_events[1][3], (105. + dx) / 200.)
+
+    def test_broadphase(self):
+        """ 测试粗筛与逐对检测一致. """
+        rng = np.random.default_rng(1)
+        env = Environment()
+        for _ in range(200):
+            obj = env.add(Entity())
+            obj.position = rng.random(2) * 100.
+            obj.velocity = rng.normal(size=2) * 5.
+            obj.step_handlers.append(lambda obj, ti: obj.position.__iadd__(obj.velocity * ti[1]))
+        trigger = ProximityTrigger(3.)
+        env.step_events.append(trigger)
+        env.reset(step=0.1, duration=2)
+        while not env.is_over():
+            env.step()
+            objs = env.entities
+            pos = np.array([obj.position for obj in objs])
+            d = np.sqrt(((pos[:, None] - pos[None]) ** 2).sum(axis=-1))
+            expected = {(objs[i].id, objs[j].id) for i, j in zip(*np.nonzero(d <= 3.))
+                        if i < j}
+            self.assertEqual(trigger.inside, expected)
+
+    def test_departed(self):
+        """ 测试实体退出检测时触发离开事件. """
+        env = Environment()
+        objs = [env.add(Entity(name)) for name in 'abc']
+        for k, obj in enumerate(objs):
+            obj.position = np.array([float(k), 0.])
+        events = []
+        trigger = ProximityTrigger(
+            1.5, on_exit=lambda a, b, t: events.append((a.name, b.name, round(t, 6))))
+        env.step_events.append(trigger)
+        env.reset(step=0.1, duration=1)
+        env.step()
+        self.assertEqual(len(trigger.inside), 2)
+
+        objs[1].set_active(False)
+        env.step()
+        self.assertEqual(events, [('a', 'b', 0.1), ('b', 'c', 0.1)])
+
+        # 少于两个实体时.
+        objs[1].set_active(True)
+        env.step()
+        events.clear()
+        env.remove(objs[0])
+        env.remove(objs[2])
+        env.step()
+        self.assertEqual(events, [('a', 'b', 0.3), ('b', 'c', 0.3)])
+        self.assertEqual(trigger.inside, set())
+
+    def test_teleport(self):
+        """ 测试瞬移离开范围时触发离开事件. """
+        env = Environment()
+        a, b = env.add(Entity('a')), env.add(Entity('b'))
+        a.position, b.position = np.array([0., 0.]), np.array([0.5, 0.])
+        events = []
+        trigger = ProximityTrigger(1., on_enter=lambda a, b, t: events.append('in'),
+                                   on_exit=lambda a, b, t: events.append('out'))
+        env.step_events.append(trigger)
+        env.reset(step=0.1, duration=1)
+        env.step()
+        b.position = np.array([100., 0.])
+        env.step()
+        self.assertEqual(events, ['in', 'out'])
+        self.assertEqual(trigger.inside, set())
@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from simu import Environment, Entity
+from simu.common import MoveEntity
+from simu.record import Recorder, load_records
+
+
+class RecorderTest(unittest.TestCase):
+    def make_env(self):
+        env = Environment()
+        env.add(MoveEntity('a', speed=1, waypoints=[[0, 0], [10, 0]]))
+        env.add(MoveEntity('b', speed=2, waypoints=[[0, 0], [0, 10]]))
+        env.add(Entity('c'))
+        return env
+
+    def test_memory(self):
+        """ 测试记录至内存. """
+        env = self.make_env()
+        recorder = Recorder(props=['position', 'velocity'])
+        env.step_events.append(recorder)
+        env.run(duration=2)
+        records = recorder.records
+        self.assertEqual(records['position'].shape, (20, 2, 2))
+        np.testing.assert_almost_equal(records['time'], np.arange(20) * 0.1)
+        np.testing.assert_almost_equal(records['position'][-1], [[1.9, 0], [0, 3.8]])
+
+        # 重新运行时重新记录.
+        env.run(duration=1)
+        self.assertEqual(len(recorder.records['time']), 10)
+
+    def test_file(self):
+        """ 测试分块写入文件. """
+        env = self.make_env()
+        with tempfile.TemporaryDirectory() as path:
+            recorder = Recorder(path=path, chunk_size=7)
+            env.step_events.append(recorder)
+            env.run(duration=2)
+            recorder.close()
+            records = load_records(path)
+            self.assertEqual(records['names'], ['a', 'b'])
+            self.assertEqual(records['position'].shape, (20, 2, 2))
+            np.testing.assert_almost_equal(records['position'][-1], [[1.9, 0], [0, 3.8]])
+
+            # 超出预计步数时扩充文件.
+            env.reset(duration=1)
+            for _ in range(15):
+                env.step()
+            recorder.close()
+            records = load_records(path)
+            self.assertEqual(len(records['time']), 15)
+            self.assertFalse(os.path.exists(os.path.join(path, 'time.npy.old')))
+            del records
@@ -0,0 +1,68 @@
+import tempfile
+import unittest
+
+import numpy as np
+from simu import Environment, Entity
+from simu.common import MoveEntity
+from simu.record import Recorder
+from simu.replay import Replayer
+
+
+class Sensor(Entity):
+    """ 记录观测到的目标位置. """
+
+    def __init__(self):
+        super().__init__('sensor')
+        self.seen = []
+        self.access_handlers.append(Sensor.observe)
+
+    def observe(self, other):
+        if other.name == 'b':
+            self.seen.append(other.position.copy())
+
+
+class ReplayTest(unittest.TestCase):
+    def record(self, path):
+        env = Environment()
+        env.add(MoveEntity('a', speed=1, waypoints=[[0, 0], [10, 0]]))
+        env.add(MoveEntity('b', speed=2, waypoints=[[0, 0], [0, 10]]))
+        recorder = Recorder(props=['position', 'velocity'], path=path)
+        env.step_events.append(recorder)
+        env.run(duration=2)
+        recorder.close()
+        return env
+
+    def test_replay(self):
+        """ 测试回放与实时实体混合运行. """
+        with tempfile.TemporaryDirectory() as path:
+            self.record(path)
+            env = Environment()
+            replayer = env.add(Replayer(path))
+            sensor = env.add(Sensor())
+            live = env.add(MoveEntity('c', speed=1, waypoints=[[0, 0], [10, 0]]))
+            self.assertEqual([obj.name for obj in replayer.members], ['a', 'b'])
+
+            env.run(duration=1.5)
+            np.testing.assert_almost_equal(env.find('a').position, live.position)
+            np.testing.assert_almost_equal(env.find('b').position, [0, 2.8])
+            np.testing.assert_almost_equal(env.find('b').velocity, [0, 2.])
+            # 互操作读取步进前的回放状态.
+            np.testing.assert_almost_equal(sensor.seen[-1], [0, 2.6])
+            self.assertFalse(replayer.is_over())
+
+            # 跳转和倍速.
+            replayer.seek(0.55)
+            self.assertEqual(replayer.frame_index, 5)
+            np.testing.assert_almost_equal(env.find('a').position, [0.5, 0])
+            replayer.interpolate = True
+            replayer.seek(0.55)
+            np.testing.assert_almost_equal(env.find('a').position, [0.55, 0])
+
+            replayer.interpolate = False
+            replayer.speed = 2.
+            env.reset(duration=0.5)
+            while not env.is_over():
+                env.step()
+            np.testing.assert_almost_equal(replayer.time, 0.8)
+            np.testing.assert_almost_equal(env.find('b').position, [0, 1.6])
+            del replayer, env
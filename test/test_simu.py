@@ -1,6 +1,9 @@
+import copy
+import tracemalloc
 import unittest
 import time
-from simu import Environment, Entity
+import numpy as np
+from simu import Environment, Entity, CompactEntity
 
 
 class SimuTestCase(unittest.TestCase):
@@ -41,6 +44,245 @@ class SimuTestCase(unittest.TestCase):
         env.remove(obj2.id)
         self.assertTrue(len(env.entities) == 2)
 
+    def test_entity_find_by_name(self):
+        """ 测试按名字查找实体. """
+        env = Environment()
+        objs = [env.add(Entity(name)) for name in ['a', 'b', 'a', 'c']]
+        self.assertIs(env.find('a'), objs[0])
+        self.assertEqual(env.find_all('a'), [objs[0], objs[2]])
+        self.assertEqual(env.find_all('d'), [])
+
+        env.remove('a')
+        self.assertIs(env.find('a'), objs[2])
+        self.assertIsNone(env.find(objs[0]))
+        self.assertEqual(env.entities, objs[1:])
+
+        objs[1].name = 'd'
+        self.assertIsNone(env.find('b'))
+        self.assertIs(env.find('d'), objs[1])
+        env.remove(objs[1])
+        self.assertIsNone(env.find('d'))
+        self.assertEqual(env.entities, [objs[2], objs[3]])
+
+    def test_run_active(self):
+        """ 测试活动状态切换. """
+        env = Environment()
+        objs = [env.add(Entity(str(i))) for i in range(4)]
+        seen = {}
+
+        def record(obj, other):
+            seen.setdefault(obj.name, []).append(other.name)
+
+        for obj in objs:
+            obj.access_handlers.append(record)
+        objs[1].set_active(False)
+        objs[3].set_active(False)
+        env.reset()
+        env.step()
+        self.assertEqual(seen, {'0': ['2'], '2': ['0']})
+
+        seen.clear()
+        objs[3].set_active(True)
+        objs[1].set_active(True)
+        env.remove(objs[0])
+        env.step()
+        self.assertEqual(seen['1'], ['2', '3'])
+        self.assertEqual(seen['3'], ['1', '2'])
+        self.assertEqual(len(seen), 3)
+
+        # 重写 is_active 的实体每步检查.
+        class Blinker(Entity):
+            def is_active(self):
+                return self.on
+
+        blinker = Blinker('b')
+        blinker.on = False
+        blinker.steps = 0
+        blinker.step_handlers.append(lambda obj, ti: setattr(obj, 'steps', obj.steps + 1))
+        env.add(blinker)
+        env.step()
+        blinker.on = True
+        env.step()
+        env.step()
+        blinker.on = False
+        env.step()
+        self.assertEqual(blinker.steps, 2)
+        self.assertEqual([obj.name for obj in env._active_list], ['1', '2', '3'])
+
+    def test_compact_entity(self):
+        """ 测试紧凑实体. """
+        def move(obj, time_info):
+            obj.value += 1.
+
+        def record(obj, other):
+            obj.seen.append(other.value[0])
+
+        class Debris(CompactEntity):
+            __slots__ = ('value', 'seen')
+            protect_props = ('value',)
+            default_step_handlers = (move,)
+
+            def __init__(self, name=''):
+                super().__init__(name)
+                self.value = np.zeros(2)
+                self.seen = []
+
+        env = Environment()
+        objs = [env.add(Debris(str(i))) for i in range(3)]
+        objs[0].access_handlers.append(record)
+        self.assertIsNone(objs[1]._step_handlers)
+        self.assertIs(env.find('1'), objs[1])
+
+        env.reset()
+        for _ in range(3):
+            env.step()
+        self.assertEqual(objs[0].seen, [0., 0., 1., 1., 2., 2.])
+        self.assertEqual(objs[2].value[0], 3.)
+        self.assertIsNone(objs[1]._access_handlers)
+
+        other = copy.deepcopy(objs[2])
+        other.value += 1.
+        self.assertEqual(objs[2].value[0], 3.)
+        self.assertEqual(other.id, objs[2].id)
+
+        def footprint(cls, reader):
+            """ 运行两步后环境占用的内存. reader 为是否有读取镜像的实体. """
+            tracemalloc.start()
+            env = Environment()
+            for _ in range(10000):
+                env.add(cls())
+            if reader:
+                env.add(Entity()).access_handlers.append(lambda obj, other: None)
+            env.reset()
+            env.step()
+            env.step()
+            size = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            return size
+
+        # 没有读取者时不生成镜像；没有保护属性的紧凑实体始终不生成镜像.
+        self.assertLess(footprint(Entity, False) * 2, footprint(Entity, True))
+        self.assertLess(3 * footprint(CompactEntity, True), footprint(Entity, True))
+
+    def test_run_groups(self):
+        """ 测试分组互操作. """
+        env = Environment()
+        visits = []
+
+        def record(obj, other):
+            visits.append((obj.name, other.name))
+
+        sensors = [env.add(Entity('s%d' % i)) for i in range(3)]
+        targets = [env.add(Entity('t%d' % i)) for i in range(2)]
+        other = env.add(Entity('x'))
+        for obj in sensors + targets + [other]:
+            obj.access_handlers.append(record)
+        for obj in sensors:
+            obj.group = 'sensor'
+        for obj in targets:
+            obj.group = 'target'
+        env.set_interaction('sensor', ['target'])
+        env.set_interaction('target', ['target'])
+
+        env.reset()
+        env.step()
+        self.assertEqual(sorted(v for v in visits if v[0] == 's1'), [('s1', 't0'), ('s1', 't1')])
+        self.assertEqual(sorted(v for v in visits if v[0][0] == 't'), [('t0', 't1'), ('t1', 't0')])
+        self.assertEqual(len([v for v in visits if v[0] == 'x']), 5)
+
+        # 改变分组.
+        visits.clear()
+        other.group = 'target'
+        env.set_interaction('target', None)
+        env.step()
+        self.assertEqual(sorted(v[1] for v in visits if v[0] == 's0'), ['t0', 't1', 'x'])
+        self.assertEqual(len([v for v in visits if v[0] == 't0']), 5)
+
+    def test_run_pair_handler(self):
+        """ 测试成对互操作. """
+        class Point(Entity):
+            def __init__(self, name, x, period=1):
+                super().__init__(name)
+                self.position = np.array([x, 0.])
+                self.hits = []
+                self.update_period = period
+
+        def touch(a, b, a_prev, b_prev):
+            for obj, other in ((a, b_prev), (b, a_prev)):
+                if obj is not None:
+                    obj.hits.append(other.name)
+
+        env = Environment()
+        objs = [env.add(Point(str(i), float(i))) for i in range(4)]
+        env.add_pair_handler(touch)
+        env.reset()
+        env.step()
+        self.assertEqual(objs[0].hits, ['1', '2', '3'])
+        self.assertEqual(sorted(objs[2].hits), ['0', '1', '3'])
+
+        # 分组和作用半径.
+        for obj in objs:
+            obj.hits.clear()
+            obj.group = 'a' if obj.name in '01' else 'b'
+        env.remove_pair_handler(touch)
+        env.add_pair_handler(touch, groups=('a', 'b'), radius=1.5)
+        env.step()
+        self.assertEqual([obj.hits for obj in objs], [[], ['2'], ['1'], []])
+
+        # 不在本步更新的实体.
+        objs[2].update_period = 2
+        env.step()
+        for obj in objs:
+            obj.hits.clear()
+        env.step()
+        self.assertEqual([obj.hits for obj in objs], [[], ['2'], [], []])
+
+    def test_scheduled_events(self):
+        """ 测试按步数、仿真时间和条件调度的步进事件. """
+        env = Environment()
+        obj = env.add(Entity('obj'))
+        obj.value = 0
+        obj.step_handlers.append(lambda e, ti: setattr(e, 'value', e.value + 1))
+        ticks, times, changes, checks = [], [], [], []
+
+        def when(e):
+            checks.append(e.value)
+            return 5 <= e.value < 8
+
+        env.add_step_event(lambda env: ticks.append(env.clock.ticks), every=3)
+        env.add_step_event(lambda e: times.append(round(e.env.time_info[0], 6)), obj, interval=0.25)
+        def on_change(e):
+            changes.append(e.value)
+
+        env.add_step_event(on_change, obj, when=when)
+        env.run(duration=1)
+        self.assertEqual(ticks, [0, 3, 6, 9])
+        self.assertEqual(times, [0., 0.3, 0.5, 0.8])
+        self.assertEqual(changes, [5, 8])
+        self.assertEqual(len(checks), 10)
+
+        # 条件与步数组合：只在到期时检查条件.
+        env.remove_step_event(on_change)
+        checks.clear()
+        changes.clear()
+        obj.value = 0
+        env.add_step_event(lambda e: changes.append(e.value), obj, every=2, when=when)
+        env.run(duration=1)
+        self.assertEqual(checks, [1, 3, 5, 7, 9])
+        self.assertEqual(changes, [5, 9])
+
+        # 实体不活动时不调用，移出环境后删除.
+        times.clear()
+        env.reset()
+        obj.set_active(False)
+        env.step()
+        self.assertEqual(times, [])
+        env.remove(obj)
+        env.add(obj)
+        env.run(duration=1)
+        self.assertEqual(times, [])
+        self.assertEqual(ticks[-4:], [0, 3, 6, 9])
+
     def test_run(self):
         """ 测试场景运行. """
         env = Environment()
@@ -74,6 +316,56 @@ class SimuTestCase(unittest.TestCase):
         self.assertAlmostEqual(env.time_info[0], 5., 3)
         self.assertTrue(env.is_over())
 
+    def test_run_realtime_pacing(self):
+        """ 测试实时仿真的倍速和超时处理. """
+        env = Environment()
+        obj = env.add(Entity())
+
+        t = time.perf_counter()
+        env.run(realtime=True, duration=0.5, step=0.05, time_scale=2.)
+        elapsed = time.perf_counter() - t
+        # 只检查下限（实时运行不会提前完成），上限留足调度余量.
+        self.assertTrue(0.25 <= elapsed < 2.)
+        self.assertEqual(env.clock.ticks, 10)
+        self.assertEqual(env.clock.stats['steps'], 10)
+
+        def stall(obj, time_info):
+            if abs(time_info[0] - 0.2) < 1e-6:
+                time.sleep(0.055)
+
+        obj.step_handlers.append(stall)
+        steps = []
+        obj.step_events.append(lambda o: steps.append(o.env.time_info[1]))
+        # 更新周期大于 1 的实体：丢弃步数时不错过更新，步进时间之和等于实际经过的时间.
+        slow = env.add(Entity())
+        slow.update_period = 3
+        updates = []
+        slow.step_handlers.append(lambda o, ti: updates.append(ti))
+        for overrun in ('catch_up', 'drop', 'slow'):
+            steps.clear()
+            updates.clear()
+            t = time.perf_counter()
+            env.run(realtime=True, duration=0.5, step=0.02, time_scale=1., overrun=overrun)
+            elapsed = time.perf_counter() - t
+            stats = env.clock.stats
+            self.assertGreaterEqual(stats['missed'], 1)
+            if overrun == 'catch_up':
+                self.assertTrue(0.48 <= elapsed < 2.)
+                self.assertEqual(len(steps), 25)
+                self.assertEqual(stats['dropped'], 0)
+            elif overrun == 'drop':
+                self.assertTrue(0.48 <= elapsed < 2.)
+                self.assertGreaterEqual(stats['dropped'], 1)
+                self.assertEqual(len(steps), 25 - stats['dropped'])
+                self.assertAlmostEqual(sum(steps), 0.48)
+                self.assertAlmostEqual(updates[-1][0], 0.48)
+            else:
+                self.assertTrue(elapsed >= 0.5 + 0.03)
+                self.assertEqual(len(steps), 25)
+                self.assertEqual(stats['dropped'], 0)
+            self.assertAlmostEqual(sum(dt for _, dt in updates), updates[-1][0])
+        self.assertRaises(ValueError, env.reset, overrun='skip')
+
     def test_run_access(self):
         """ 测试互操作等. """
         class StepCounter:
@@ -96,3 +388,94 @@ class SimuTestCase(unittest.TestCase):
         env.run()
         self.assertTrue(True)
         self.assertTrue(counter1.counter == counter2.counter == 100)
+
+    def test_run_snapshot(self):
+        """ 测试互操作读取步进前的状态. """
+        class Counter(Entity):
+            def __init__(self):
+                super().__init__()
+                self.protect_props.append('value')
+                self.value = np.zeros(2)
+                self.seen = []
+
+            def step(self, time_info):
+                self.value += 1.
+
+        def record(obj, other):
+            obj.seen.append(other.value.copy())
+
+        for mode in ('buffer', 'copy'):
+            env = Environment()
+            env.snapshot_mode = mode
+            obj1 = env.add(Counter())
+            obj1.access_handlers.append(record)
+            obj2 = env.add(Counter())
+            obj2.access_handlers.append(record)
+
+            env.reset()
+            for _ in range(3):
+                env.step()
+            values = [v[0] for v in obj1.seen]
+            self.assertEqual(values, [0., 1., 2.])
+            self.assertEqual(obj2.value[0], 3.)
+
+    def test_run_workers(self):
+        """ 测试线程池并行执行. """
+        class Counter(Entity):
+            def __init__(self):
+                super().__init__()
+                self.protect_props.append('value')
+                self.value = np.zeros(1)
+                self.total = 0.
+                self.events = 0
+
+            def step(self, time_info):
+                self.value += 1.
+
+        def accumulate(obj, other):
+            obj.total += other.value[0]
+
+        results = []
+        for workers in (0, 4):
+            env = Environment()
+            env.set_workers(workers, chunk_size=3)
+            for _ in range(20):
+                obj = env.add(Counter())
+                obj.access_handlers.append(accumulate)
+                obj.step_events.append(lambda o: setattr(o, 'events', o.events + 1))
+            env.run(duration=1)
+            env.close()
+            results.append([(obj.value[0], obj.total, obj.events) for obj in env.entities])
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[1][0], (10., 19 * 45., 10))
+
+    def test_run_update_period(self):
+        """ 测试实体按各自的更新周期步进. """
+        class Recorder(Entity):
+            def __init__(self, period):
+                super().__init__()
+                self.update_period = period
+                self.steps = []
+                self.accesses = 0
+                self.events = 0
+
+            def step(self, time_info):
+                self.steps.append(time_info)
+
+        def count_access(obj, other):
+            obj.accesses += 1
+
+        env = Environment()
+        fast = env.add(Recorder(1))
+        slow = env.add(Recorder(3))
+        for obj in (fast, slow):
+            obj.access_handlers.append(count_access)
+            obj.step_events.append(lambda o: setattr(o, 'events', o.events + 1))
+        env.run(duration=1)
+
+        self.assertEqual(len(fast.steps), 10)
+        self.assertEqual(fast.accesses, 10)
+        self.assertEqual([round(t, 6) for t, _ in slow.steps], [0., 0.3, 0.6, 0.9])
+        self.assertEqual([round(dt, 6) for _, dt in slow.steps], [0., 0.3, 0.3, 0.3])
+        self.assertEqual(slow.accesses, 4)
+        self.assertEqual(slow.events, 4)
@@ -0,0 +1,50 @@
+import unittest
+
+import numpy as np
+from simu import Environment, Entity
+from simu.spatial import UniformGrid
+
+
+class SpatialTest(unittest.TestCase):
+    def test_uniform_grid(self):
+        """ 测试网格查询与穷举结果一致. """
+        points = np.random.random((500, 3)) * 100 - 50
+        grid = UniformGrid(7.5)
+        grid.build(points)
+        for _ in range(20):
+            center = np.random.random(3) * 100 - 50
+            radius = np.random.random() * 20
+            expected = np.flatnonzero(
+                np.linalg.norm(points - center, axis=1) <= radius)
+            np.testing.assert_array_equal(grid.query(center, radius), expected)
+
+        grid.build([])
+        self.assertEqual(len(grid.query([0, 0], 1.)), 0)
+
+    def test_interaction_radius(self):
+        """ 测试按互操作半径筛选互操作对象. """
+        class Point(Entity):
+            def __init__(self, name, pos):
+                super().__init__(name)
+                self.protect_props.append('position')
+                self.position = np.array(pos, dtype=float)
+                self.neighbors = []
+
+        def record(obj, other):
+            obj.neighbors.append(other.name)
+
+        env = Environment()
+        a = env.add(Point('a', [0, 0]))
+        a.interaction_radius = 1.5
+        a.access_handlers.append(record)
+        env.add(Point('b', [1, 0]))
+        env.add(Point('c', [0, -1.5]))
+        env.add(Point('d', [3, 3]))
+        env.add(Entity('e'))
+        b = env.find('b')
+        b.access_handlers.append(record)
+
+        env.reset()
+        env.step()
+        self.assertEqual(a.neighbors, ['b', 'c', 'e'])
+        self.assertEqual(b.neighbors, ['a', 'c', 'd', 'e'])
@@ -47,7 +47,7 @@ class Test(TestCase):
             self.assertAlmostEqual(angle(p1, p2), angle(p2, p1))
 
     def test_array(self):
-        v1 = np.array([0, 8, 0], np.float)
+        v1 = np.array([0, 8, 0], float)
         v2 = vec.array(v1)
         self.assertEqual(id(v1), id(v2))
 
@@ -103,3 +103,31 @@ class Test(TestCase):
 
         v = vec.unit([0, 0])
         np.testing.assert_almost_equal(v, [0, 0])
+
+    def test_batch(self):
+        """ 测试批量计算. """
+        v = np.array([[3., 4., 0.], [0., 0., 0.], [0., -2., 0.]])
+        center = np.array([0., 0., 0.])
+        np.testing.assert_array_almost_equal(vec.dist(v), [5., 0., 2.])
+        np.testing.assert_array_almost_equal(vec.dist(v, [0., 0., 1.]),
+                                             [26 ** 0.5, 1., 5 ** 0.5])
+        np.testing.assert_array_almost_equal(
+            vec.unit(v), [[0.6, 0.8, 0.], [0., 0., 0.], [0., -1., 0.]])
+        np.testing.assert_array_almost_equal(
+            vec.proj(v, [[1., 0., 0.], [1., 0., 0.], [1., 1., 0.]]),
+            [[3., 0., 0.], [0., 0., 0.], [-1., -1., 0.]])
+        np.testing.assert_array_almost_equal(
+            angle(v, [[3., 4., 0.], [1., 0., 0.], [1., 0., 0.]]), [0., 0., 90.])
+        np.testing.assert_array_almost_equal(
+            angle([[1., 0.], [1., 1.]], [-1., 0.], fmt='r'), [np.pi, 0.75 * np.pi])
+
+        aer = xyz_to_aer([[1., 0., 0.], [0., 1., 1.], [0., 0., 0.], [-1., -1., 0.]], center)
+        np.testing.assert_array_almost_equal(
+            aer, [[90., 0., 1.], [0., 45., 2 ** 0.5], [0., 0., 0.], [225., 0., 2 ** 0.5]])
+        np.testing.assert_array_almost_equal(
+            xyz_to_aer([[2., 1., 1.]], [1., 1., 1.], fmt='r'), [[np.pi / 2, 0., 1.]])
+        np.testing.assert_array_almost_equal(
+            aer_to_xyz([[90., 0., 1.], [0., 45., 2 ** 0.5], [180., -90., 3.]], [1., 1., 1.]),
+            [[2., 1., 1.], [1., 2., 2.], [1., 1., -2.]])
+        np.testing.assert_array_almost_equal(
+            aer_to_xyz([[np.pi, 0., 2.]], fmt='r'), [[0., -2., 0.]])